@@ -0,0 +1,219 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Conversión por lotes de directorios de archivos .txt a PDF Braille.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app.utils.braillebook import US_LETTER_PROFILE, cli_profile, write_braille_pdfs
+from app.utils.brailletext import write_braille_text
+from app.utils.contractions import load_table
+from app.utils.textfile import iter_text
+
+
+ORIENTATIONS = {
+    'mirror': (True,),
+    'normal': (False,),
+    'both': (True, False),
+}
+MANIFEST_NAME = '.braillebook-manifest.json'
+
+
+def output_paths(out_dir, input_name, mirrors):
+    """
+    Devuelve la ruta de salida de cada orientación: <nombre>_mirror.pdf o <nombre>_normal.pdf.
+    """
+    stem = os.path.splitext(input_name)[0]
+    return [os.path.join(out_dir, f"{stem}_{'mirror' if mirror else 'normal'}.pdf") for mirror in mirrors]
+
+
+def file_digest(path, options):
+    """
+    Hash SHA-256 del contenido de un archivo junto con las opciones de conversión.
+    """
+    digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode('utf-8'))
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def options_digest(options):
+    """
+    Hash SHA-256 de las opciones de conversión.
+    """
+    return hashlib.sha256(json.dumps(options, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _is_up_to_date(input_path, outputs, check, entry, manifest_entry):
+    """
+    entry es lo que se guardaría en el manifiesto si el archivo se convirtiera ahora;
+    manifest_entry, lo que se guardó en la última conversión.
+    """
+    if not all(os.path.exists(path) for path in outputs):
+        return False
+    # En los dos modos, una salida hecha con otras opciones (hoja, tabla, dibujo) no está al día
+    if not isinstance(manifest_entry, dict) or manifest_entry.get('options') != entry['options']:
+        return False
+    if check == 'hash':
+        return manifest_entry.get('hash') == entry['hash']
+    input_mtime = os.path.getmtime(input_path)
+    return all(os.path.getmtime(path) >= input_mtime for path in outputs)
+
+
+def _convert_file(input_path, outputs, mirrors, stamp, profile, contractions, braille_format='pdf'):
+    """
+    Tarea de un proceso de trabajo: convierte un archivo y devuelve su registro de resumen.
+    """
+    start = time.perf_counter()
+    record = {'file': input_path, 'input_bytes': os.path.getsize(input_path)}
+    try:
+        table = load_table(contractions) if contractions else None
+        if braille_format == 'pdf':
+            record['pages'] = write_braille_pdfs(iter_text(input_path), outputs, mirrors, stamp=stamp, profile=profile,
+                                                 contractions=table)
+        else:
+            record['pages'] = write_braille_text(iter_text(input_path), outputs[0], braille_format, profile, table)
+        record['status'] = 'converted'
+        record['outputs'] = {path: os.path.getsize(path) for path in outputs}
+    except Exception as error:
+        record['status'] = 'error'
+        record['error'] = f"{type(error).__name__}: {error}"
+    record['seconds'] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def convert_file(input_path, output_path, braille_format='pdf', mirror=True, stamp=True,
+                 profile=US_LETTER_PROFILE, contractions=None):
+    """
+    Convierte un archivo a un PDF o a texto braille. Se puede enviar tal cual a un grupo de procesos.
+    Args:
+        input_path (str): Archivo de texto (UTF-8).
+        output_path (str): Archivo de salida.
+        braille_format (str): 'pdf' o un formato de texto de app.utils.brailletext ('brf', 'unicode').
+        mirror (bool): Si es True, el PDF se genera en modo espejo.
+        stamp (bool): Si es True, usa un Form XObject por patrón de celda (PDF más pequeño).
+        profile (PageProfile): Hoja del documento.
+        contractions (str or None): Nombre de la tabla de Grado 2, o None para Grado 1.
+    Returns:
+        dict: El registro del archivo, como los de convert_directory.
+    """
+    return _convert_file(input_path, [output_path], (mirror,), stamp, profile, contractions, braille_format)
+
+
+def convert_directory(in_dir, out_dir, orientation='mirror', workers=None, stamp=True,
+                      check='mtime', force=False, summary=None, profile=US_LETTER_PROFILE, contractions=None):
+    """
+    Convierte todos los archivos .txt de un directorio en paralelo.
+    Args:
+        in_dir (str): Directorio con los archivos .txt.
+        out_dir (str): Directorio donde se escriben los PDF (se crea si no existe).
+        orientation (str): 'mirror', 'normal' o 'both'.
+        workers (int or None): Número de procesos; None usa todos los núcleos.
+        stamp (bool): Si es True, usa un Form XObject por patrón de celda (PDF más pequeño).
+        check (str): Cómo saber si una salida está al día: 'mtime' o 'hash'.
+        force (bool): Si es True, convierte todos los archivos aunque estén al día.
+        summary (file or None): Flujo de texto donde se escribe una línea JSON por archivo.
+        profile (PageProfile): Hoja de los PDF.
+        contractions (str or None): Nombre de la tabla de Grado 2 (ver app.utils.contractions),
+            o None para Grado 1.
+    Returns:
+        list of dict: El registro de cada archivo, en orden alfabético.
+    """
+    mirrors = ORIENTATIONS[orientation]
+    os.makedirs(out_dir, exist_ok=True)
+    # El manifiesto guarda, por archivo, el hash de las opciones con que se convirtió
+    # y, con check='hash', también el del contenido.
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    options = {'mirrors': mirrors, 'stamp': stamp, 'page': profile.parameters()}
+    if contractions:
+        options['contractions'] = load_table(contractions).digest
+    options_hash = options_digest(options)
+
+    names = sorted(name for name in os.listdir(in_dir)
+                   if name.lower().endswith('.txt') and os.path.isfile(os.path.join(in_dir, name)))
+    records = {}
+    entries = {}
+    jobs = []
+    for name in names:
+        input_path = os.path.join(in_dir, name)
+        outputs = output_paths(out_dir, name, mirrors)
+        entries[name] = {'options': options_hash}
+        if check == 'hash':
+            entries[name]['hash'] = file_digest(input_path, options)
+        if not force and _is_up_to_date(input_path, outputs, check, entries[name], manifest.get(name)):
+            records[name] = {'file': input_path, 'status': 'skipped', 'seconds': 0.0,
+                             'input_bytes': os.path.getsize(input_path),
+                             'outputs': {path: os.path.getsize(path) for path in outputs}}
+            _write_record(summary, records[name])
+        else:
+            jobs.append((name, input_path, outputs))
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_convert_file, input_path, outputs, mirrors, stamp, profile, contractions): name
+                       for name, input_path, outputs in jobs}
+            for future in as_completed(futures):
+                name = futures[future]
+                records[name] = future.result()
+                if records[name]['status'] == 'converted':
+                    manifest[name] = entries[name]
+                _write_record(summary, records[name])
+
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+    return [records[name] for name in names]
+
+
+def _write_record(summary, record):
+    if summary is not None:
+        summary.write(json.dumps(record, ensure_ascii=False) + '\n')
+        summary.flush()
+
+
+def run(args):
+    """
+    Ejecuta el subcomando "batch" con los argumentos ya analizados.
+    Returns:
+        int: Código de salida: 0 si todos los archivos se convirtieron o estaban al día.
+    """
+    profile = cli_profile(args)
+    if args.summary == '-':
+        records = convert_directory(args.in_dir, args.out_dir, args.orientation, args.workers,
+                                    args.stamp, args.check, args.force, sys.stdout, profile,
+                                    args.contractions)
+    else:
+        with open(args.summary, 'a', encoding='utf-8') as summary:
+            records = convert_directory(args.in_dir, args.out_dir, args.orientation, args.workers,
+                                        args.stamp, args.check, args.force, summary, profile,
+                                        args.contractions)
+    return 1 if any(record['status'] == 'error' for record in records) else 0
@@ -16,13 +16,31 @@
 
 
 
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen.pathobject import PDFPathObject
+from reportlab.lib.rl_accel import fp_str
 from io import BytesIO
-import fitz # PyMuPDF
-from PIL import Image
+import argparse
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+from itertools import chain, count, repeat
+import cProfile
+import os
+import re
+import sys
+import time
+import zlib
+import numpy as np
 import io
 
+from app.utils.pdfwriter import PdfStreamWriter
+from app.utils.textfile import iter_text
+
 # --- Definición de Constantes Basadas en el Estándar Braille ---
 
 # Factor de conversión de pulgadas a puntos (1 pulgada = 72 puntos)
@@ -87,6 +105,161 @@ LINE_ADJUSTMENTS[8] = -.9 # Ajuste para la cuarta línea (índice 3)
 # LINE_ADJUSTMENTS[2] = -0.2 # Ajuste para la tercera línea (ejemplo: moverla 0.2 puntos más arriba)
 
 
+class PageProfile:
+    """
+    Geometría de una hoja: tamaño, márgenes, paso de celda y de línea y ajustes de interlineado.
+    Es inmutable y hashable, así que varias conversiones simultáneas pueden usar hojas
+    distintas sin estado compartido, y sirve como parte de una clave de caché.
+    Las medidas de los puntos y de la celda son las del estándar y no dependen de la hoja.
+
+    En interpunto (verso_offset distinto de None) las páginas se imprimen por las dos caras:
+    las de índice par (0, 2, ...) son el recto de cada hoja y las impares el verso, que se
+    dibuja con la geometría de `verso`. La paginación es la misma para las dos caras.
+
+    Atributos (además de los argumentos del constructor):
+        cells_per_line (int): Celdas que caben en una línea.
+        lines_per_page (int): Líneas que caben en una página.
+        line_tops (tuple): Coordenada Y de la parte superior de cada línea, con sus ajustes.
+        cell_lefts (tuple): Coordenada X de la esquina izquierda de cada celda de una línea.
+        verso (PageProfile or None): Geometría de las páginas del verso, o None si la hoja
+            se imprime por una sola cara.
+    """
+
+    __slots__ = ('name', 'width', 'height', 'margins', 'cell_advance_width', 'cell_advance_height',
+                 'line_adjustments', 'verso_offset', 'cells_per_line', 'lines_per_page', 'line_tops', 'cell_lefts',
+                 'verso', '_line_tops_array', '_cell_lefts_array', '_key')
+
+    def __init__(self, name, width, height, margins=(LEFT_MARGIN_POINTS, TOP_MARGIN_POINTS,
+                                                      RIGHT_MARGIN_POINTS, BOTTOM_MARGIN_POINTS),
+                 cell_advance_width=CELL_ADVANCE_WIDTH, cell_advance_height=CELL_ADVANCE_HEIGHT,
+                 line_adjustments=(), verso_offset=None):
+        """
+        Args:
+            name (str): Nombre de la hoja (no interviene en la comparación).
+            width (float): Ancho de la hoja en puntos.
+            height (float): Alto de la hoja en puntos.
+            margins (tuple): Márgenes (izquierdo, superior, derecho, inferior) en puntos.
+            cell_advance_width (float): Paso horizontal de celda a celda en puntos.
+            cell_advance_height (float): Paso vertical de línea a línea en puntos.
+            line_adjustments (sequence of float): Puntos que se suman al paso de cada línea,
+                como LINE_ADJUSTMENTS; las líneas sin ajuste usan 0.
+            verso_offset (tuple or None): Desplazamiento (x, y) en puntos del verso, hacia la
+                derecha y hacia abajo en su propia cara, para que sus puntos caigan entre los
+                del recto (p. ej. DEFAULT_VERSO_OFFSET). None imprime por una sola cara.
+        """
+        left, top, right, bottom = (float(margin) for margin in margins)
+        cells_per_line = max(1, int((width - left - right) / cell_advance_width))
+        lines_per_page = max(1, int((height - top - bottom) / cell_advance_height))
+        line_adjustments = tuple(float(adjustment) for adjustment in line_adjustments[:lines_per_page])
+        line_adjustments += (0.0,) * (lines_per_page - len(line_adjustments))
+
+        y = height - top
+        line_tops = [y]
+        for line in range(1, lines_per_page):
+            y -= (cell_advance_height + line_adjustments[line])
+            line_tops.append(y)
+        x = left
+        cell_lefts = [x]
+        for _ in range(1, cells_per_line):
+            x += cell_advance_width
+            cell_lefts.append(x)
+
+        line_tops_array = np.array(line_tops)
+        cell_lefts_array = np.array(cell_lefts)
+        line_tops_array.flags.writeable = False
+        cell_lefts_array.flags.writeable = False
+        values = {
+            'name': name,
+            'width': float(width),
+            'height': float(height),
+            'margins': (left, top, right, bottom),
+            'cell_advance_width': float(cell_advance_width),
+            'cell_advance_height': float(cell_advance_height),
+            'line_adjustments': line_adjustments,
+            'cells_per_line': cells_per_line,
+            'lines_per_page': lines_per_page,
+            'line_tops': tuple(line_tops),
+            'cell_lefts': tuple(cell_lefts),
+            '_line_tops_array': line_tops_array,
+            '_cell_lefts_array': cell_lefts_array,
+        }
+        verso = None
+        if verso_offset is not None:
+            # El verso se lee por la otra cara: su margen izquierdo es el derecho del recto.
+            # El desplazamiento mueve el bloque de texto sin cambiar cuántas celdas y líneas caben.
+            verso_offset = tuple(float(offset) for offset in verso_offset)
+            dx, dy = verso_offset
+            verso = PageProfile(name + ' (verso)', width, height, (right + dx, top + dy, left - dx, bottom - dy),
+                                cell_advance_width, cell_advance_height, line_adjustments)
+            if (verso.cells_per_line, verso.lines_per_page) != (cells_per_line, lines_per_page):
+                raise ValueError('El desplazamiento del verso cambia las celdas por línea o las líneas por página')
+        values['verso_offset'] = verso_offset
+        values['verso'] = verso
+        values['_key'] = (values['width'], values['height'], values['margins'], values['cell_advance_width'],
+                          values['cell_advance_height'], line_adjustments, verso_offset)
+        for attribute, value in values.items():
+            object.__setattr__(self, attribute, value)
+
+    def __setattr__(self, attribute, value):
+        raise AttributeError('PageProfile es inmutable')
+
+    def __delattr__(self, attribute):
+        raise AttributeError('PageProfile es inmutable')
+
+    def __eq__(self, other):
+        return isinstance(other, PageProfile) and self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __reduce__(self):
+        return (PageProfile, (self.name, self.width, self.height, self.margins, self.cell_advance_width,
+                              self.cell_advance_height, self.line_adjustments, self.verso_offset))
+
+    def __repr__(self):
+        return 'PageProfile(%r, %d x %d celdas%s)' % (self.name, self.cells_per_line, self.lines_per_page,
+                                                     ', interpunto' if self.verso else '')
+
+    @property
+    def pagesize(self):
+        return (self.width, self.height)
+
+    def parameters(self):
+        """
+        Devuelve los valores que determinan la geometría, en tipos serializables como JSON.
+        """
+        width, height, margins, cell_advance_width, cell_advance_height, line_adjustments, verso_offset = self._key
+        parameters = {'page_size': [width, height], 'margins': list(margins),
+                      'pitches': [cell_advance_width, cell_advance_height], 'line_adjustments': list(line_adjustments)}
+        if verso_offset is not None:
+            parameters['verso_offset'] = list(verso_offset)
+        return parameters
+
+    def with_interpoint(self, verso_offset=None):
+        """
+        Devuelve la misma hoja impresa por las dos caras.
+        Args:
+            verso_offset (tuple or None): Desplazamiento (x, y) del verso; None usa DEFAULT_VERSO_OFFSET.
+        Returns:
+            PageProfile: La hoja en interpunto.
+        """
+        return PageProfile(self.name, self.width, self.height, self.margins, self.cell_advance_width,
+                           self.cell_advance_height, self.line_adjustments,
+                           DEFAULT_VERSO_OFFSET if verso_offset is None else verso_offset)
+
+
+# Desplazamiento por defecto del verso en interpunto: media línea hacia abajo, así que
+# las líneas del verso caen entre las del recto.
+DEFAULT_VERSO_OFFSET = (0.0, CELL_ADVANCE_HEIGHT / 2)
+
+# Hoja carta con los márgenes y ajustes de arriba, y A4 con los mismos márgenes.
+# Los ajustes de interlineado se afinaron a mano para carta, así que A4 no los hereda.
+US_LETTER_PROFILE = PageProfile('letter', US_LETTER_WIDTH_POINTS, US_LETTER_HEIGHT_POINTS,
+                                line_adjustments=LINE_ADJUSTMENTS)
+A4_PROFILE = PageProfile('a4', *A4)
+PAGE_PROFILES = {profile.name: profile for profile in (US_LETTER_PROFILE, A4_PROFILE)}
+
+
 # --- Mapeo de Caracteres Braille (Grado 1) ---
 braille_uppercase_marker = '010001'
 braille_number_marker = '010111'
@@ -115,27 +288,847 @@ braille_punctuation = {
     '-': '000011',
 }
 
-# --- Funciones de Dibujo Braille ---
+# --- Instrumentación ---
+#
+# Desactivada por defecto: cada etapa solo consulta una ContextVar. Con collect_stats()
+# se acumulan tiempos por etapa y contadores; con profile() o la variable de entorno
+# BRAILLEBOOK_PROFILE se guarda un perfil de cProfile.
 
-def _binary_to_braille(binary_string):
+class ConversionStats:
     """
-    Convierte una cadena binaria de 6 bits en un formato de celda Braille.
+    Tiempos por etapa y contadores de las conversiones hechas mientras está activa.
+
+    Atributos:
+        timings (dict): Etapa -> segundos acumulados ('translate', 'layout', 'draw',
+            'serialize', 'merge', 'open', 'rasterize', 'encode_png', 'preview').
+        counters (dict): Nombre -> total ('chars', 'pages', 'cells', 'dots', 'output_bytes').
+        callback (callable or None): Se llama con (etapa, segundos) al terminar cada etapa.
+    """
+
+    def __init__(self, callback=None):
+        self.timings = {}
+        self.counters = {}
+        self.callback = callback
+
+    def add_time(self, stage, seconds):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        if self.callback is not None:
+            self.callback(stage, seconds)
+
+    def count(self, **counters):
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self):
+        return {'timings': dict(self.timings), 'counters': dict(self.counters)}
+
+    def __repr__(self):
+        return 'ConversionStats(%r)' % self.as_dict()
+
+
+class _StageTimer:
+    __slots__ = ('stats', 'stage', 'start')
+
+    def __init__(self, stats, stage):
+        self.stats = stats
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.stats.add_time(self.stage, time.perf_counter() - self.start)
+
+
+_STATS = ContextVar('braillebook_stats', default=None)
+_PROFILING = ContextVar('braillebook_profiling', default=False)
+_NO_STAGE = nullcontext()
+_profile_counter = count()
+
+
+def _stage(stage):
+    """Mide una etapa si hay estadísticas activas; si no, no hace nada."""
+    stats = _STATS.get()
+    return _NO_STAGE if stats is None else _StageTimer(stats, stage)
+
+
+def _count(**counters):
+    stats = _STATS.get()
+    if stats is not None:
+        stats.count(**counters)
+
+
+@contextmanager
+def collect_stats(callback=None):
+    """
+    Activa la instrumentación durante el bloque, en el hilo o tarea actual.
+    Las conversiones que se dibujan en otros procesos solo cuentan lo que se hace en este.
+    Args:
+        callback (callable or None): Se llama con (etapa, segundos) al terminar cada etapa.
+    Yields:
+        ConversionStats: Las estadísticas acumuladas.
+    """
+    stats = ConversionStats(callback)
+    token = _STATS.set(stats)
+    try:
+        yield stats
+    finally:
+        _STATS.reset(token)
+
+
+@contextmanager
+def profile(path):
+    """
+    Perfila el bloque con cProfile y guarda el resultado en `path` (se lee con pstats).
+    """
+    profiler = cProfile.Profile()
+    token = _PROFILING.set(True)
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        _PROFILING.reset(token)
+        profiler.dump_stats(path)
+
+
+def _profiled(function):
+    """
+    Con BRAILLEBOOK_PROFILE=directorio, perfila cada llamada exterior a `function` y la
+    guarda como <directorio>/<función>-<pid>-<n>.pstats.
+    """
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        directory = os.environ.get('BRAILLEBOOK_PROFILE')
+        if not directory or _PROFILING.get():
+            return function(*args, **kwargs)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, '%s-%d-%d.pstats' % (function.__name__, os.getpid(), next(_profile_counter)))
+        with profile(path):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+# --- Representación intermedia: flujo de celdas ---
+#
+# La traducción produce códigos de celda de 6 bits: el bit i corresponde al
+# punto i + 1 del estándar braille (bit 0 = punto 1, ..., bit 5 = punto 6).
+# Es el mismo orden que usa el bloque Unicode U+2800.
+
+# Orden de los caracteres en las cadenas binarias de los mapeos: fila por fila,
+# columna izquierda y luego derecha (puntos 1, 4, 2, 5, 3, 6).
+_BINARY_DOT_ORDER = (0, 3, 1, 4, 2, 5)
+
+
+def _binary_to_cell(binary_string):
+    """
+    Convierte una cadena binaria de 6 bits en un código de celda de 6 bits.
     """
     if len(binary_string) != 6:
         raise ValueError("La cadena binaria debe tener 6 bits.")
-    braille_cell = [
-        binary_string[0] + binary_string[1],
-        binary_string[2] + binary_string[3],
-        binary_string[4] + binary_string[5]
-    ]
-    return braille_cell
+    cell = 0
+    for bit, value in zip(_BINARY_DOT_ORDER, binary_string):
+        if value == '1':
+            cell |= 1 << bit
+    return cell
+
+
+def _char_to_cells(char):
+    """
+    Devuelve las celdas de un carácter como (marcador, celda).
+    Cualquiera de los dos puede ser None; si ambos lo son, el carácter se ignora.
+    """
+    if char.isupper():
+        binary = braille_alphabet.get(char.lower())
+        marker = _binary_to_cell(braille_uppercase_marker)
+    elif char.isdigit():
+        binary = braille_numbers.get(char)
+        marker = _binary_to_cell(braille_number_marker)
+    elif char in braille_punctuation:
+        binary = braille_punctuation[char]
+        marker = None
+    else: # Minúsculas y caracteres acentuados
+        binary = braille_alphabet.get(char.lower())
+        marker = None
+    return marker, (_binary_to_cell(binary) if binary else None)
+
+
+# --- Tabla de traducción precalculada ---
+#
+# Cada carácter se traduce a una secuencia de "fichas" de un byte:
+#   0x00-0x3F  celda normal (código de 6 bits)
+#   0x40-0x7F  marcador de mayúscula o número (0x40 | código); si llena la línea,
+#              el salto de línea se produce de inmediato
+#   0x80       carácter sin mapeo: no dibuja nada, pero sí salta si la línea está llena
+#   0x81       salto de línea explícito
+# Un marcador siempre va delante de la ficha de su carácter (si el carácter no tiene
+# celda, esa ficha es 0x80) y cada carácter tiene exactamente una ficha que no es
+# marcador, así que la posición en el texto de cualquier ficha se obtiene restando los
+# marcadores que la preceden. Las contracciones de Grado 2 (app.utils.contractions)
+# mantienen esa regla.
+MARKER_FLAG = 0x40
+_NO_CELL_TOKEN = b'\x80'
+_NEWLINE_TOKEN = b'\x81'
+
+
+def _char_to_tokens(char):
+    """
+    Devuelve las fichas de traducción de un carácter como cadena de caracteres latin-1.
+    """
+    if char == '\n':
+        return _NEWLINE_TOKEN.decode('latin-1')
+    marker, cell = _char_to_cells(char)
+    tokens = bytearray()
+    if marker is not None:
+        tokens.append(MARKER_FLAG | marker)
+    if cell is not None:
+        tokens.append(cell)
+    elif marker is not None:
+        tokens += _NO_CELL_TOKEN
+    return (tokens or _NO_CELL_TOKEN).decode('latin-1')
+
+
+class _TranslationTable(dict):
+    """
+    Tabla para str.translate: punto de código -> fichas de traducción.
+    Los caracteres que no se precalcularon se traducen y guardan la primera vez que aparecen.
+    """
+
+    def __missing__(self, codepoint):
+        tokens = self[codepoint] = _char_to_tokens(chr(codepoint))
+        return tokens
+
+
+def _build_translation_table():
+    chars = set('\n')
+    for mapping in (braille_alphabet, braille_numbers, braille_punctuation):
+        chars.update(mapping)
+    chars.update(char.upper() for char in braille_alphabet)
+    return _TranslationTable((ord(char), _char_to_tokens(char)) for char in chars)
+
+
+_TRANSLATION_TABLE = _build_translation_table()
+
+
+def _tokenize(text, contractions=None):
+    """
+    Fichas de un texto: letra a letra (Grado 1) o con una tabla de contracciones.
+    Con contracciones, `text` no debe empezar ni terminar a mitad de una palabra.
+    """
+    if contractions is None:
+        return text.translate(_TRANSLATION_TABLE).encode('latin-1')
+    return contractions.translate(text)
+
+# Quita la marca de marcador (0x40) y elimina las fichas sin celda
+_TOKENS_TO_CELLS = bytes(range(0x40)) * 2 + bytes(range(0x80, 0x100))
+# Basta una ficha sin celda para saltar de línea; las repetidas se pueden compactar
+_NO_CELL_RUN = re.compile(_NO_CELL_TOKEN + b'{2,}')
+_MARKER_TOKENS = bytes(range(MARKER_FLAG, 0x80))
+
+
+def _count_markers(tokens):
+    return len(tokens) - len(tokens.translate(None, _MARKER_TOKENS))
+
+
+def _trailing_markers(tokens):
+    return len(tokens) - len(tokens.rstrip(_MARKER_TOKENS))
+
+
+class CellStream:
+    """
+    Texto traducido y paginado, independiente de cualquier formato de salida.
+
+    Atributos:
+        cells (array('B')): Códigos de celda de 6 bits, en orden de lectura.
+        line_offsets (array('I')): Índice en `cells` donde comienza cada línea.
+        page_offsets (array('I')): Índice en `line_offsets` donde comienza cada página.
+        page_sources (list or None): Origen de cada página en el texto como
+            (posición del carácter, fichas de ese carácter ya colocadas en la página
+            anterior), o None si la traducción no lo registró.
+        profile (PageProfile): Hoja con la que se paginó; los renderizadores usan su geometría.
+    """
+
+    __slots__ = ('cells', 'line_offsets', 'page_offsets', 'page_sources', 'profile')
+
+    def __init__(self, cells, line_offsets, page_offsets, page_sources=None, profile=US_LETTER_PROFILE):
+        self.cells = cells
+        self.line_offsets = line_offsets
+        self.page_offsets = page_offsets
+        self.page_sources = page_sources
+        self.profile = profile
+
+    @property
+    def num_lines(self):
+        return len(self.line_offsets)
+
+    @property
+    def num_pages(self):
+        return len(self.page_offsets)
+
+    def line_cells(self, line):
+        """Devuelve las celdas de la línea indicada."""
+        start = self.line_offsets[line]
+        end = self.line_offsets[line + 1] if line + 1 < len(self.line_offsets) else len(self.cells)
+        return self.cells[start:end]
+
+    def page_lines(self, page):
+        """Itera sobre las celdas de cada línea de la página indicada."""
+        first = self.page_offsets[page]
+        last = self.page_offsets[page + 1] if page + 1 < len(self.page_offsets) else len(self.line_offsets)
+        for line in range(first, last):
+            yield self.line_cells(line)
+
+    def page_slice(self, first, last):
+        """Devuelve un nuevo flujo con las páginas [first, last)."""
+        first_line = self.page_offsets[first]
+        last_line = self.page_offsets[last] if last < len(self.page_offsets) else len(self.line_offsets)
+        first_cell = self.line_offsets[first_line]
+        last_cell = self.line_offsets[last_line] if last_line < len(self.line_offsets) else len(self.cells)
+        return CellStream(self.cells[first_cell:last_cell],
+                          array('I', (offset - first_cell for offset in self.line_offsets[first_line:last_line])),
+                          array('I', (offset - first_line for offset in self.page_offsets[first:last])),
+                          self.page_sources[first:last] if self.page_sources is not None else None,
+                          self.profile)
+
+
+def join_streams(streams):
+    """
+    Une varios flujos de celdas, en orden, en uno solo.
+    Args:
+        streams (iterable of CellStream): Grupos de páginas consecutivas, paginados con la misma hoja.
+    Returns:
+        CellStream: Todas las páginas seguidas.
+    """
+    cells = array('B')
+    line_offsets = array('I')
+    page_offsets = array('I')
+    page_sources = []
+    profile = US_LETTER_PROFILE
+    for stream in streams:
+        profile = stream.profile
+        page_offsets.extend(offset + len(line_offsets) for offset in stream.page_offsets)
+        line_offsets.extend(offset + len(cells) for offset in stream.line_offsets)
+        cells.extend(stream.cells)
+        if page_sources is not None and stream.page_sources is not None:
+            page_sources.extend(stream.page_sources)
+        else:
+            page_sources = None
+    return CellStream(cells, line_offsets, page_offsets, page_sources, profile)
+
+
+# Caracteres del primer trozo al retomar la traducción a mitad del texto (ver _Paginator.resume)
+RESUME_CHUNK_SIZE = 4096
+
+
+class _Paginator:
+    """
+    Reparte párrafos de fichas en líneas y páginas.
+    Las páginas completas pueden retirarse a medida que se llenan, para traducir por trozos.
+    Con track_sources=True también registra dónde empieza cada página en el texto.
+    """
+
+    def __init__(self, track_sources=False, text_offset=0, skip=0, pages_before=0, profile=US_LETTER_PROFILE):
+        """
+        Args:
+            track_sources (bool): Si es True, registra el origen de cada página. Las fichas
+                sin celda repetidas no se compactan, porque cambiarían las posiciones.
+            text_offset (int): Posición en el texto del primer carácter que se va a añadir.
+            skip (int): Fichas de ese primer carácter que ya se colocaron y no se añaden.
+            pages_before (int): Páginas del documento anteriores a la primera que se añade.
+            profile (PageProfile): Hoja que fija las celdas por línea y las líneas por página.
+        """
+        self._profile = profile
+        self._cells_per_line = profile.cells_per_line
+        self._lines_per_page = profile.lines_per_page
+        self._cell_chunks = []
+        self._num_cells = 0 # Celdas acumuladas desde la última página retirada
+        self._line_offsets = array('I')
+        self._num_pages_taken = pages_before
+        self._page_sources = [] if track_sources else None
+        # Posición del párrafo actual: fichas y marcadores desde text_offset
+        self._text_offset = text_offset
+        self._skip = skip
+        self._token_position = 0
+        self._markers = 0
+        self._leading_markers = skip # Marcadores seguidos justo antes del párrafo
+
+    @property
+    def num_pages_started(self):
+        """Páginas empezadas (aunque no estén completas) que aún no se han retirado; requiere track_sources."""
+        return len(self._page_sources)
+
+    def page_source(self, index):
+        """Origen en el texto, como en CellStream.page_sources, de la página empezada número `index`."""
+        return self._page_sources[index]
+
+    def resume(self, text, contractions=None, end=None, chunk_size=RESUME_CHUNK_SIZE):
+        """
+        Traduce el texto desde el origen del paginador (text_offset y skip) por trozos cada vez
+        mayores, y devuelve el control tras cada trozo para que quien llama decida si seguir.
+        Al llegar al final del texto añade el último párrafo, y devuelve el control una vez más.
+        Args:
+            text (str): El texto completo.
+            contractions (ContractionTable or None): Tabla de Grado 2, o None para Grado 1.
+            end (int or None): Final del primer trozo; None usa chunk_size caracteres.
+            chunk_size (int): Tamaño del segundo trozo; cada trozo siguiente dobla al anterior.
+        Yields:
+            int: La posición del texto hasta la que se ha traducido.
+        """
+        text_offset = self._text_offset
+        # Con contracciones se traduce desde el principio de la palabra y por palabras enteras
+        position = text_offset if contractions is None else contractions.word_start(text, text_offset)
+        if end is None:
+            end = position + chunk_size
+        pending = b''
+        while True:
+            if contractions is not None:
+                end = contractions.word_end(text, end)
+            chunk = text[position:end]
+            if not chunk:
+                self.add_paragraph(pending)
+                yield position
+                return
+            tokens = _tokenize(chunk, contractions)
+            if position <= text_offset:
+                tokens = tokens[_char_token_index(tokens, text_offset - position) + self._skip:]
+            paragraphs = (pending + tokens).split(_NEWLINE_TOKEN)
+            for paragraph in paragraphs[:-1]:
+                self.add_paragraph(paragraph)
+            pending = self.add_partial_paragraph(paragraphs[-1])
+            position += len(chunk)
+            end = position + chunk_size
+            chunk_size *= 2
+            yield position
+
+    def _record_sources(self, paragraph, line_starts):
+        """
+        Anota el origen de las líneas nuevas que abren página.
+        line_starts(first) devuelve la ficha del párrafo donde empieza su línea número `first`.
+        """
+        first_line = self._num_pages_taken * self._lines_per_page + len(self._line_offsets)
+        for line in range(-first_line % self._lines_per_page, len(line_starts), self._lines_per_page):
+            index = line_starts[line]
+            before = paragraph[:index]
+            placed = _trailing_markers(before)
+            if placed == index:
+                placed += self._leading_markers
+            markers = self._markers + _count_markers(before)
+            self._page_sources.append((self._text_offset + self._token_position + index - markers, placed))
+
+    def _line_starts(self, paragraph, count, num_lines):
+        """
+        Ficha del párrafo donde empieza cada una de sus primeras `num_lines` líneas.
+        """
+        # La primera línea empieza con el párrafo y las demás en su primera celda
+        starts = list(range(0, count, self._cells_per_line))
+        if _NO_CELL_TOKEN in paragraph and len(starts) > 1:
+            cell_tokens = np.flatnonzero(np.frombuffer(paragraph, dtype=np.uint8) != _NO_CELL_TOKEN[0])
+            starts[1:] = cell_tokens[starts[1:]].tolist()
+        # La línea vacía tras una línea llena empieza en el salto de línea que cierra el párrafo
+        return ([0] + starts[1:] + [len(paragraph)])[:num_lines]
+
+    def add_paragraph(self, paragraph):
+        """
+        Añade un párrafo completo, es decir, seguido de un salto de línea o del final del texto.
+        """
+        # Cada párrafo empieza en la columna 0, así que sus líneas son
+        # simplemente trozos de cells_per_line celdas.
+        cells = paragraph.translate(_TOKENS_TO_CELLS, _NO_CELL_TOKEN)
+        count = len(cells)
+        num_lines = max(1, -(-count // self._cells_per_line))
+        if count % self._cells_per_line == 0 and count:
+            # Una línea llena abre otra vacía si termina en un marcador o la siguen
+            # caracteres sin mapeo, igual que al recorrer el texto carácter a carácter.
+            tail = paragraph.rstrip(_NO_CELL_TOKEN)
+            if len(tail) < len(paragraph) or tail[-1] & MARKER_FLAG:
+                num_lines += 1
+        if self._page_sources is not None:
+            if -(self._num_pages_taken * self._lines_per_page + len(self._line_offsets)) % self._lines_per_page < num_lines:
+                self._record_sources(paragraph, self._line_starts(paragraph, count, num_lines))
+            self._markers += _count_markers(paragraph)
+            self._token_position += len(paragraph) + 1
+            self._leading_markers = 0
+        self._line_offsets.extend(range(self._num_cells, self._num_cells + count, self._cells_per_line))
+        self._line_offsets.extend(repeat(self._num_cells + count, num_lines - -(-count // self._cells_per_line)))
+        if count:
+            self._cell_chunks.append(cells)
+            self._num_cells += count
+
+    def add_partial_paragraph(self, paragraph):
+        """
+        Añade las líneas ya completas de un párrafo que continúa en el siguiente trozo.
+        Returns:
+            bytes: Las fichas que aún no forman una línea completa.
+        """
+        cells = paragraph.translate(_TOKENS_TO_CELLS, _NO_CELL_TOKEN)
+        # Una línea está completa cuando ya hay al menos una celda después de ella
+        complete = (len(cells) - 1) // self._cells_per_line * self._cells_per_line
+        if complete <= 0:
+            return paragraph if self._page_sources is not None else _NO_CELL_RUN.sub(_NO_CELL_TOKEN, paragraph)
+        line_starts = self._line_starts(paragraph, complete + 1, complete // self._cells_per_line + 1)
+        cut = line_starts.pop()
+        if self._page_sources is not None:
+            self._record_sources(paragraph, line_starts)
+            self._markers += _count_markers(paragraph[:cut])
+            self._token_position += cut
+            placed = _trailing_markers(paragraph[:cut])
+            self._leading_markers = placed + self._leading_markers if placed == cut else placed
+        self._line_offsets.extend(range(self._num_cells, self._num_cells + complete, self._cells_per_line))
+        self._cell_chunks.append(cells[:complete])
+        self._num_cells += complete
+        if self._page_sources is not None:
+            return paragraph[cut:]
+        return _NO_CELL_RUN.sub(_NO_CELL_TOKEN, paragraph[cut:])
+
+    def take_pages(self, limit=None):
+        """
+        Retira las páginas que ya no pueden cambiar.
+        Args:
+            limit (int or None): Número máximo de páginas a retirar.
+        Returns:
+            CellStream or None: Las páginas retiradas, o None si todavía no hay ninguna.
+        """
+        # La última página pendiente se guarda hasta saber si es la última del documento
+        num_pages = (len(self._line_offsets) - 1) // self._lines_per_page
+        if limit is not None:
+            num_pages = min(num_pages, limit)
+        if num_pages <= 0:
+            return None
+        num_lines = num_pages * self._lines_per_page
+        num_cells = self._line_offsets[num_lines]
+        cells = b''.join(self._cell_chunks)
+        page_sources = None
+        if self._page_sources is not None:
+            page_sources = self._page_sources[:num_pages]
+            del self._page_sources[:num_pages]
+        stream = CellStream(array('B', cells[:num_cells]),
+                            self._line_offsets[:num_lines],
+                            array('I', range(0, num_lines, self._lines_per_page)),
+                            page_sources, self._profile)
+        self._cell_chunks = [cells[num_cells:]]
+        self._num_cells -= num_cells
+        self._line_offsets = array('I', (offset - num_cells for offset in self._line_offsets[num_lines:]))
+        self._num_pages_taken += num_pages
+        return stream
+
+    def finish(self):
+        """
+        Devuelve las páginas restantes una vez añadido todo el texto.
+        Returns:
+            CellStream: Las páginas que quedaban por retirar.
+        """
+        cells = array('B', b''.join(self._cell_chunks))
+        line_offsets = self._line_offsets
+        page_offsets = array('I', range(0, len(line_offsets), self._lines_per_page))
+        page_sources = self._page_sources
+
+        # La última página solo se conserva si tiene algún punto (siempre queda al menos una)
+        if len(page_offsets) + self._num_pages_taken > 1:
+            last_page_cells = line_offsets[page_offsets[-1]]
+            if not any(cells[last_page_cells:]):
+                del line_offsets[page_offsets[-1]:]
+                del cells[last_page_cells:]
+                page_offsets.pop()
+                if page_sources is not None:
+                    page_sources.pop()
+
+        return CellStream(cells, line_offsets, page_offsets, page_sources, self._profile)
+
+
+@_profiled
+def translate_text(text, profile=US_LETTER_PROFILE, contractions=None):
+    """
+    Traduce texto a braille y lo pagina en un flujo de celdas.
+    Args:
+        text (str): El texto de entrada a convertir.
+        profile (PageProfile): Hoja con la que se pagina.
+        contractions (ContractionTable or None): Tabla de Grado 2 (ver app.utils.contractions);
+            None traduce letra a letra (Grado 1).
+    Returns:
+        CellStream: Las celdas de todo el documento con sus saltos de línea y de página,
+            incluido el origen de cada página en el texto.
+    """
+    with _stage('translate'):
+        paginator = _Paginator(track_sources=True, profile=profile)
+        for paragraph in _tokenize(text, contractions).split(_NEWLINE_TOKEN):
+            paginator.add_paragraph(paragraph)
+        stream = paginator.finish()
+    _count(chars=len(text))
+    return stream
+
+
+def _iter_text_chunks(source, chunk_size=1 << 20):
+    """
+    Itera sobre los trozos de texto de un iterable de cadenas o de un archivo de texto abierto.
+    """
+    if hasattr(source, 'read'):
+        return iter(lambda: source.read(chunk_size), '')
+    return iter(source)
+
+
+def iter_translate(source, profile=US_LETTER_PROFILE, contractions=None):
+    """
+    Traduce texto por trozos y devuelve las páginas a medida que se completan.
+    La memoria usada no depende de la longitud del texto.
+    Args:
+        source (iterable of str or file): Trozos de texto, o un archivo de texto abierto.
+        profile (PageProfile): Hoja con la que se pagina.
+        contractions (ContractionTable or None): Tabla de Grado 2, o None para Grado 1.
+    Yields:
+        CellStream: Grupos de páginas consecutivas, en orden.
+    """
+    paginator = _Paginator(profile=profile)
+    pending = b''
+    chunks = _iter_text_chunks(source)
+    if contractions is not None:
+        chunks = contractions.whole_word_chunks(chunks)
+    for chunk in chunks:
+        with _stage('translate'):
+            paragraphs = (pending + _tokenize(chunk, contractions)).split(_NEWLINE_TOKEN)
+            for paragraph in paragraphs[:-1]:
+                paginator.add_paragraph(paragraph)
+            pending = paginator.add_partial_paragraph(paragraphs[-1])
+            stream = paginator.take_pages()
+        _count(chars=len(chunk))
+        if stream is not None:
+            yield stream
+    with _stage('translate'):
+        paginator.add_paragraph(pending)
+        stream = paginator.finish()
+    yield stream
+
+
+# --- Índice de páginas ---
+
+class PageIndex:
+    """
+    Dónde empieza cada página de un documento, en el texto y en las celdas.
+    Con él, cualquier página o rango se traduce y se dibuja empezando en su origen,
+    sin pasar por las páginas anteriores (ver translate_pages). La caché lo guarda
+    junto a los PDF (ver app.utils.cache).
+
+    Atributos:
+        text_offsets (ndarray): Posición en el texto del carácter con que empieza cada página.
+        skips (ndarray): Fichas de ese carácter ya colocadas en la página anterior.
+        cell_offsets (ndarray): Índice en las celdas del documento donde empieza cada página.
+        text_length (int): Longitud del texto indexado, para no usar el índice con otro texto.
+    """
+
+    __slots__ = ('text_offsets', 'skips', 'cell_offsets', 'text_length')
+
+    # Cabecera de to_bytes: firma, y versión, páginas y longitud del texto en 64 bits
+    MAGIC = b'BBPI'
+    VERSION = 1
+
+    def __init__(self, text_offsets, skips, cell_offsets, text_length):
+        self.text_offsets = np.asarray(text_offsets, dtype=np.int64)
+        self.skips = np.asarray(skips, dtype=np.int64)
+        self.cell_offsets = np.asarray(cell_offsets, dtype=np.int64)
+        self.text_length = text_length
+
+    @classmethod
+    def from_stream(cls, stream, text_length):
+        """
+        Args:
+            stream (CellStream): Documento completo devuelto por translate_text.
+            text_length (int): Longitud del texto traducido.
+        Returns:
+            PageIndex: El índice de sus páginas.
+        """
+        if stream.page_sources is None:
+            raise ValueError('El flujo no registró el origen de sus páginas.')
+        sources = np.array(stream.page_sources, dtype=np.int64).reshape(-1, 2)
+        line_offsets = np.frombuffer(stream.line_offsets, dtype=np.uint32)
+        page_offsets = np.frombuffer(stream.page_offsets, dtype=np.uint32)
+        return cls(sources[:, 0], sources[:, 1], line_offsets[page_offsets], text_length)
+
+    @property
+    def num_pages(self):
+        return len(self.text_offsets)
+
+    def to_bytes(self):
+        """
+        Serialización compacta: las diferencias entre páginas consecutivas, comprimidas.
+        """
+        header = np.array([self.VERSION, self.num_pages, self.text_length], dtype='<u8')
+        body = np.concatenate([np.diff(self.text_offsets, prepend=0), self.skips,
+                               np.diff(self.cell_offsets, prepend=0)]).astype('<u8')
+        return self.MAGIC + header.tobytes() + zlib.compress(body.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Args:
+            data (bytes): Lo devuelto por to_bytes.
+        Returns:
+            PageIndex: El índice guardado.
+        """
+        header_end = len(cls.MAGIC) + 24
+        if data[:len(cls.MAGIC)] != cls.MAGIC or len(data) < header_end:
+            raise ValueError('No es un índice de páginas.')
+        version, num_pages, text_length = np.frombuffer(data, dtype='<u8', count=3, offset=len(cls.MAGIC)).tolist()
+        if version != cls.VERSION:
+            raise ValueError('Versión de índice de páginas no soportada: %d' % version)
+        body = np.frombuffer(zlib.decompress(data[header_end:]), dtype='<u8').astype(np.int64)
+        if len(body) != 3 * num_pages:
+            raise ValueError('Índice de páginas truncado.')
+        deltas, skips, cell_deltas = body.reshape(3, num_pages)
+        return cls(np.cumsum(deltas), skips, np.cumsum(cell_deltas), text_length)
+
+
+def translate_pages(text, index, first, last=None, profile=US_LETTER_PROFILE, contractions=None):
+    """
+    Traduce solo las páginas [first, last) de un texto, empezando en el origen que el
+    índice da para la primera. El trabajo depende de las páginas pedidas, no del texto anterior.
+    Args:
+        text (str): El mismo texto con el que se construyó el índice.
+        index (PageIndex): Índice de páginas del texto, con la misma hoja y tabla.
+        first (int): Primera página (0-indexado).
+        last (int or None): Página siguiente a la última; None llega hasta el final.
+        profile (PageProfile): Hoja con la que se pagina.
+        contractions (ContractionTable or None): Tabla de Grado 2, o None para Grado 1.
+    Returns:
+        CellStream: Las mismas páginas que translate_text(text).page_slice(first, last),
+            incluido su origen en el texto.
+    """
+    if len(text) != index.text_length:
+        raise ValueError('El índice de páginas no corresponde a este texto.')
+    last = index.num_pages if last is None else last
+    if not 0 <= first < last <= index.num_pages:
+        raise ValueError('Páginas [%d, %d) fuera de un documento de %d' % (first, last, index.num_pages))
+    num_pages = last - first
+    text_offset, skip = int(index.text_offsets[first]), int(index.skips[first])
+    with _stage('translate'):
+        paginator = _Paginator(track_sources=True, text_offset=text_offset, skip=skip, pages_before=first,
+                               profile=profile)
+        # El primer trozo llega hasta donde empieza la página siguiente al rango; si la última
+        # línea aún no está cerrada, se traduce un poco más cada vez.
+        end = int(index.text_offsets[last]) + 1 if last < index.num_pages else len(text)
+        position = text_offset
+        for position in paginator.resume(text, contractions, end):
+            if paginator.num_pages_started > num_pages:
+                break
+        if paginator.num_pages_started > num_pages:
+            stream = paginator.take_pages(limit=num_pages)
+        else:
+            stream = paginator.finish()
+    _count(chars=position - text_offset)
+    return stream
+
+
+# --- Funciones de Dibujo Braille ---
+
+# Páginas mínimas por tarea al dibujar en paralelo; con menos, el coste de arrancar
+# procesos y unir los PDF supera lo que se gana.
+MIN_PAGES_PER_WORKER_TASK = 8
+
+# Número de puntos de cada código de celda
+_DOTS_PER_CELL = np.array([bin(cell).count('1') for cell in range(64)])
+
+
+def _count_drawing(stream):
+    """Cuenta las páginas, celdas con puntos y puntos dibujados de un flujo."""
+    if _STATS.get() is not None:
+        cells = np.frombuffer(stream.cells, dtype=np.uint8)
+        _count(pages=stream.num_pages, cells=int(np.count_nonzero(cells)), dots=int(_DOTS_PER_CELL[cells].sum()))
+
+
+# --- Maquetación vectorizada ---
+
+# Desplazamiento de cada punto respecto a la esquina superior izquierda de la celda,
+# en el orden de dibujo de _draw_braille_cell (puntos 1, 4, 2, 5, 3, 6).
+_DOT_COLUMN_OFFSETS = np.array([0.0, COLUMN_SEPARATION] * 3)
+_DOT_ROW_OFFSETS = np.array([POINT_RADIUS, POINT_RADIUS,
+                             ROW_SEPARATION + POINT_RADIUS, ROW_SEPARATION + POINT_RADIUS,
+                             2 * ROW_SEPARATION + POINT_RADIUS, 2 * ROW_SEPARATION + POINT_RADIUS])
+
+
+class Layout:
+    """
+    Posiciones de todas las celdas (o puntos) de un documento, en arreglos de NumPy.
+
+    Atributos:
+        page (ndarray): Página de cada elemento.
+        x (ndarray): Coordenada X de cada elemento (esquina izquierda de la celda o centro del punto).
+        y (ndarray): Coordenada Y de cada elemento (parte superior de la celda o centro del punto).
+        cells (ndarray or None): Código de cada celda; None en una maquetación de puntos.
+        page_starts (ndarray): Índice del primer elemento de cada página, más el total al final.
+    """
+
+    __slots__ = ('page', 'x', 'y', 'cells', 'page_starts')
+
+    def __init__(self, page, x, y, cells, page_starts):
+        self.page = page
+        self.x = x
+        self.y = y
+        self.cells = cells
+        self.page_starts = page_starts
+
+    def page_range(self, page):
+        """Devuelve el intervalo [inicio, fin) de los elementos de la página indicada."""
+        return int(self.page_starts[page]), int(self.page_starts[page + 1])
+
+
+def layout_cells(stream, first_page=0):
+    """
+    Calcula de una vez la página y la posición de todas las celdas de un flujo.
+    Args:
+        stream (CellStream): Celdas paginadas devueltas por translate_text.
+        first_page (int): Número en el documento de la primera página del flujo; en
+            interpunto decide qué páginas son recto y cuáles verso.
+    Returns:
+        Layout: Esquina superior izquierda de cada celda, en el orden de `stream.cells`.
+    """
+    cells = np.frombuffer(stream.cells, dtype=np.uint8)
+    num_cells = len(cells)
+    line_offsets = np.asarray(stream.line_offsets, dtype=np.int64)
+    page_offsets = np.asarray(stream.page_offsets, dtype=np.int64)
+
+    # Línea de cada celda y página de cada línea
+    line = np.repeat(np.arange(len(line_offsets)), np.diff(line_offsets, append=num_cells))
+    page_of_line = np.repeat(np.arange(len(page_offsets)), np.diff(page_offsets, append=len(line_offsets)))
+    column = np.arange(num_cells) - line_offsets[line]
+    line_in_page = line - page_offsets[page_of_line[line]]
+
+    page_starts = np.append(line_offsets[page_offsets], num_cells)
+    page = page_of_line[line]
+    profile = stream.profile
+    x = profile._cell_lefts_array[column]
+    y = profile._line_tops_array[line_in_page]
+    if profile.verso is not None:
+        verso = ((page + first_page) & 1).astype(bool)
+        x = np.where(verso, profile.verso._cell_lefts_array[column], x)
+        y = np.where(verso, profile.verso._line_tops_array[line_in_page], y)
+    return Layout(page=page, x=x, y=y, cells=cells, page_starts=page_starts)
+
+
+def layout_dots(stream, first_page=0):
+    """
+    Calcula de una vez el centro de todos los puntos de un flujo.
+    Los puntos quedan en orden de celda y, dentro de cada celda, en el orden de _draw_braille_cell.
+    Args:
+        stream (CellStream): Celdas paginadas devueltas por translate_text.
+        first_page (int): Número en el documento de la primera página del flujo (ver layout_cells).
+    Returns:
+        Layout: Centro de cada punto en relieve.
+    """
+    cells = layout_cells(stream, first_page)
+    bits = (cells.cells[:, None] >> np.array(_BINARY_DOT_ORDER, dtype=np.uint8)) & 1
+    cell_index, dot = np.nonzero(bits)
+    page = cells.page[cell_index]
+    return Layout(page=page,
+                  x=(cells.x[cell_index] + _DOT_COLUMN_OFFSETS[dot]) + POINT_RADIUS,
+                  y=cells.y[cell_index] - _DOT_ROW_OFFSETS[dot],
+                  cells=None,
+                  page_starts=np.searchsorted(page, np.arange(stream.num_pages + 1)))
 
 
-def _draw_braille_cell(c, x, y_top_of_cell, braille_cell_data):
+def _draw_braille_cell(path, x, y_top_of_cell, cell):
     """
-    Dibuja una celda Braille en las coordenadas especificadas.
+    Añade a un trazado los puntos de una celda Braille en las coordenadas especificadas.
     x es la coordenada X de la esquina izquierda de la celda.
     y_top_of_cell es la coordenada Y de la parte superior de la celda.
+    cell es el código de 6 bits de la celda.
     """
     # Las coordenadas Y en ReportLab aumentan hacia arriba.
     # Si y_top_of_cell es la parte superior, los puntos se dibujan "hacia abajo" desde allí.
@@ -155,133 +1148,685 @@ def _draw_braille_cell(c, x, y_top_of_cell, braille_cell_data):
         (x + COLUMN_SEPARATION + POINT_RADIUS, y_top_of_cell - (2 * ROW_SEPARATION + POINT_RADIUS))
     ]
 
-    for i, pos in enumerate(point_positions):
-        # Verifica si el bit correspondiente en braille_cell_data es '1' para dibujar el punto
-        # Los índices de braille_cell_data son 'fila' y 'columna' (0,0), (0,1), (1,0), (1,1), (2,0), (2,1)
-        if braille_cell_data[i // 2][i % 2] == '1':
-            c.circle(pos[0], pos[1], POINT_RADIUS, fill=1)
+    for bit, pos in zip(_BINARY_DOT_ORDER, point_positions):
+        # Añade el punto si el bit correspondiente está activo en la celda
+        if cell & (1 << bit):
+            path.circle(pos[0], pos[1], POINT_RADIUS)
+
+
+def _page_path(dots, page):
+    """
+    Construye un único trazado con todos los puntos de una página.
+    Args:
+        dots (Layout): Maquetación de puntos devuelta por layout_dots.
+        page (int): Número de página (0-indexado).
+    Returns:
+        PDFPathObject or None: El trazado, o None si la página no tiene puntos.
+    """
+    start, end = dots.page_range(page)
+    if start == end:
+        return None
+    path = PDFPathObject()
+    for x, y in zip(dots.x[start:end].tolist(), dots.y[start:end].tolist()):
+        path.circle(x, y, POINT_RADIUS)
+    return path
+
+
+def _page_placements(cells, page):
+    """
+    Devuelve las celdas con puntos de una página como (x, y_top_of_cell, cell).
+    Args:
+        cells (Layout): Maquetación de celdas devuelta por layout_cells.
+        page (int): Número de página (0-indexado).
+    """
+    start, end = cells.page_range(page)
+    inked = start + np.flatnonzero(cells.cells[start:end])
+    return list(zip(cells.x[inked].tolist(), cells.y[inked].tolist(), cells.cells[inked].tolist()))
+
+
+def _cell_form_name(cell):
+    return 'BrailleCell%02d' % cell
+
+
+# Recuadro de las formas de celda: incluye el radio de los puntos y medio grosor de línea del trazo
+_CELL_FORM_BBOX = (-1, -(2 * ROW_SEPARATION + 2 * POINT_RADIUS) - 1,
+                   COLUMN_SEPARATION + 2 * POINT_RADIUS + 1, 1)
+
+
+def _define_cell_forms(c, cells):
+    """
+    Define en el documento un Form XObject por cada patrón de celda usado.
+    Cada forma dibuja la celda con su esquina superior izquierda en el origen.
+    """
+    lowerx, lowery, upperx, uppery = _CELL_FORM_BBOX
+    for cell in sorted(cells):
+        c.beginForm(_cell_form_name(cell), lowerx=lowerx, lowery=lowery, upperx=upperx, uppery=uppery)
+        path = PDFPathObject()
+        _draw_braille_cell(path, 0, 0, cell)
+        c.drawPath(path, stroke=1, fill=1)
+        c.endForm()
+
+
+def _render_pdfs_serial(stream, mirrors, stamp, first_page=0):
+    """
+    Dibuja un flujo de celdas en un PDF por orientación, en el proceso actual.
+    """
+    from reportlab.pdfgen import canvas
+    width, height = stream.profile.pagesize
+    buffers = [BytesIO() for _ in mirrors]
+    canvases = [canvas.Canvas(buffer, pagesize=(width, height)) for buffer in buffers]
+    used_cells = set()
+    with _stage('layout'):
+        layout = layout_cells(stream, first_page) if stamp else layout_dots(stream, first_page)
+
+    with _stage('draw'):
+        for page in range(stream.num_pages):
+            if stamp:
+                placements = _page_placements(layout, page)
+                used_cells.update(cell for _, _, cell in placements)
+            else:
+                path = _page_path(layout, page)
+            for c, mirror in zip(canvases, mirrors):
+                # La transformación de espejo se reinicia con cada página, así que se aplica a todas
+                if mirror:
+                    c.translate(width, 0)
+                    c.scale(-1, 1)
+                if stamp:
+                    for x, y, cell in placements:
+                        c.saveState()
+                        c.translate(x, y)
+                        c.doForm(_cell_form_name(cell))
+                        c.restoreState()
+                elif path is not None:
+                    c.drawPath(path, stroke=1, fill=1)
+                c.showPage()
+
+    with _stage('serialize'):
+        for c, buffer in zip(canvases, buffers):
+            if stamp:
+                _define_cell_forms(c, used_cells)
+            c.save()
+            buffer.seek(0)
+    _count_drawing(stream)
+    return tuple(buffers)
+
+
+def _render_pdf_bytes(stream, mirrors, stamp, first_page):
+    """
+    Tarea de un proceso de trabajo: devuelve los bytes de cada PDF de un rango de páginas.
+    """
+    return tuple(buffer.getvalue() for buffer in _render_pdfs_serial(stream, mirrors, stamp, first_page))
+
+
+def _merge_pdfs(parts, stamp):
+    """
+    Concatena varios PDF en uno con PyMuPDF, conservando el contenido de cada página.
+    """
+    import fitz # PyMuPDF
+    merged = fitz.open()
+    for part in parts:
+        with fitz.open(stream=part, filetype="pdf") as document:
+            merged.insert_pdf(document)
+    # Cada parte trae su propia copia de las formas de celda; garbage=4 unifica los flujos repetidos
+    data = merged.tobytes(garbage=4 if stamp else 1)
+    merged.close()
+    return BytesIO(data)
 
 
-def create_braille_pdf(text, mirror=False):
+# --- Backend nativo: operadores PDF preformateados, sin el lienzo de ReportLab ---
+
+# Valores de `backend` de render_braille_pdfs
+PDF_BACKENDS = ('reportlab', 'native')
+
+
+@lru_cache(maxsize=None)
+def _native_operators(profile, stamp):
+    """
+    Bytes preformateados de las páginas nativas de una hoja: el comienzo de la traslación
+    de cada columna, el final de la traslación de cada línea y el dibujo de cada uno de
+    los 64 patrones. Una celda colocada es columnas[columna] + lineas[linea] + patrones[celda].
+    """
+    columns = [b'q 1 0 0 1 %s ' % fp_str(x).encode('ascii') for x in profile.cell_lefts]
+    lines = [b'%s cm ' % fp_str(y).encode('ascii') for y in profile.line_tops]
+    if stamp:
+        patterns = [b'/%s Do Q\n' % _cell_form_name(cell).encode('ascii') for cell in range(64)]
+    else:
+        patterns = [_cell_form_content(cell) + b' Q\n' for cell in range(64)]
+    return columns, lines, patterns
+
+
+def _native_page_content(stream, page, operators):
+    """
+    Operadores PDF de una página: cada celda con puntos es su patrón trasladado a su posición.
+    """
+    columns, lines, patterns = operators
+    parts = []
+    for line, cells in enumerate(stream.page_lines(page)):
+        line_end = lines[line]
+        parts += [columns[column] + line_end + patterns[cell] for column, cell in enumerate(cells) if cell]
+    return b''.join(parts)
+
+
+def _native_pages(stream, mirrors, stamp, first_page=0):
+    """
+    Genera, página a página, el contenido ya comprimido de cada orientación.
+    """
+    profile = stream.profile
+    # Operadores del recto y del verso; sin interpunto, las dos caras son iguales
+    operators = (_native_operators(profile, stamp), _native_operators(profile.verso or profile, stamp))
+    mirror_transform = _mirror_transform(profile)
+    for page in range(stream.num_pages):
+        with _stage('draw'):
+            content = _native_page_content(stream, page, operators[(first_page + page) & 1])
+        with _stage('serialize'):
+            contents = tuple(zlib.compress(mirror_transform + content if mirror else content) for mirror in mirrors)
+        yield contents
+
+
+def _native_page_bytes(stream, mirrors, stamp, first_page):
+    """
+    Tarea de un proceso de trabajo: el contenido comprimido de cada página de un rango.
+    """
+    return list(_native_pages(stream, mirrors, stamp, first_page))
+
+
+def _worker_ranges(num_pages, workers):
+    """Rangos [inicio, fin) de páginas en que se reparte un flujo entre procesos."""
+    # Unas pocas tareas por proceso reparten mejor las páginas con más o menos puntos
+    pages_per_task = max(MIN_PAGES_PER_WORKER_TASK, -(-num_pages // (workers * 4)))
+    return [(first, min(first + pages_per_task, num_pages)) for first in range(0, num_pages, pages_per_task)]
+
+
+def _render_pdfs_native(stream, mirrors, stamp, workers, first_page=0):
+    """
+    Dibuja un flujo de celdas escribiendo directamente los objetos PDF, uno por orientación.
+    Con varios procesos, cada uno comprime las páginas de un rango y aquí solo se escriben
+    en orden, sin unir documentos.
+    """
+    buffers = tuple(BytesIO() for _ in mirrors)
+    writers = [PdfStreamWriter(buffer, stream.profile.pagesize) for buffer in buffers]
+    if stamp:
+        for cell in np.unique(np.frombuffer(stream.cells, dtype=np.uint8)).tolist():
+            if cell:
+                content = _cell_form_content(cell)
+                for writer in writers:
+                    writer.add_form(_cell_form_name(cell), _CELL_FORM_BBOX, content)
+    if workers <= 1 or stream.num_pages < 2 * MIN_PAGES_PER_WORKER_TASK:
+        pages = _native_pages(stream, mirrors, stamp, first_page)
+    else:
+        ranges = _worker_ranges(stream.num_pages, workers)
+        with _stage('draw'), ProcessPoolExecutor(max_workers=workers) as executor:
+            pages = chain.from_iterable(executor.map(
+                _native_page_bytes, (stream.page_slice(first, last) for first, last in ranges),
+                repeat(mirrors), repeat(stamp), (first_page + first for first, _ in ranges)))
+    for contents in pages:
+        with _stage('serialize'):
+            for writer, content in zip(writers, contents):
+                writer.add_page(content, compressed=True)
+    with _stage('serialize'):
+        for writer, buffer in zip(writers, buffers):
+            writer.close()
+            buffer.seek(0)
+    _count_drawing(stream)
+    return buffers
+
+
+@_profiled
+def render_braille_pdfs(stream, mirrors=(True, False), stamp=False, workers=1, backend='reportlab', first_page=0):
+    """
+    Dibuja un flujo de celdas en varios PDF a la vez, uno por orientación.
+    La geometría de cada página se calcula una sola vez, con la hoja del flujo
+    (stream.profile), y se reutiliza en todos.
+    Args:
+        stream (CellStream): Celdas paginadas devueltas por translate_text.
+        mirrors (tuple of bool): Orientación de cada PDF; True genera el modo espejo.
+        stamp (bool): Si es True, cada patrón de celda se define una vez por documento
+            y se coloca por referencia, en lugar de dibujar cada punto.
+        workers (int): Número de procesos; con más de uno, los rangos de páginas se
+            dibujan en paralelo (con ReportLab, se unen con PyMuPDF).
+        backend (str): 'reportlab' dibuja con el lienzo de ReportLab; 'native' escribe
+            directamente los objetos PDF con operadores preformateados (mismo dibujo, más rápido).
+        first_page (int): Número en el documento de la primera página del flujo (ver layout_cells).
+    Returns:
+        tuple of BytesIO: Un PDF por cada valor de `mirrors`, en el mismo orden.
+    """
+    if backend not in PDF_BACKENDS:
+        raise ValueError('Backend de PDF desconocido: %r' % backend)
+    if backend == 'native':
+        buffers = _render_pdfs_native(stream, mirrors, stamp, workers, first_page)
+    elif workers <= 1 or stream.num_pages < 2 * MIN_PAGES_PER_WORKER_TASK:
+        buffers = _render_pdfs_serial(stream, mirrors, stamp, first_page)
+    else:
+        ranges = _worker_ranges(stream.num_pages, workers)
+        # Los procesos de trabajo no informan de sus etapas: aquí cuentan como 'draw'
+        with _stage('draw'), ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_render_pdf_bytes,
+                                        (stream.page_slice(first, last) for first, last in ranges),
+                                        repeat(mirrors), repeat(stamp), (first_page + first for first, _ in ranges)))
+        with _stage('merge'):
+            buffers = tuple(_merge_pdfs(parts, stamp) for parts in zip(*results))
+        _count_drawing(stream)
+    _count(output_bytes=sum(buffer.getbuffer().nbytes for buffer in buffers))
+    return buffers
+
+
+def render_braille_pdf(stream, mirror=False, stamp=False, workers=1, backend='reportlab', first_page=0):
+    """
+    Dibuja un flujo de celdas en un documento PDF.
+    Args:
+        stream (CellStream): Celdas paginadas devueltas por translate_text.
+        mirror (bool): Si es True, el PDF se generará en modo espejo (útil para impresión en relieve).
+        stamp (bool): Si es True, usa un Form XObject por patrón de celda (PDF más pequeño).
+        workers (int): Número de procesos para dibujar rangos de páginas en paralelo.
+        backend (str): 'reportlab' o 'native' (ver render_braille_pdfs).
+        first_page (int): Número en el documento de la primera página del flujo (ver layout_cells).
+    Returns:
+        BytesIO: Un objeto BytesIO que contiene el PDF generado.
+    """
+    return render_braille_pdfs(stream, (mirror,), stamp=stamp, workers=workers, backend=backend,
+                               first_page=first_page)[0]
+
+
+@_profiled
+def create_braille_pdf(text, mirror=False, stamp=False, workers=1, profile=US_LETTER_PROFILE, contractions=None,
+                       backend='reportlab'):
     """
     Crea un documento PDF con texto convertido a Braille.
     Args:
         text (str): El texto de entrada a convertir.
         mirror (bool): Si es True, el PDF se generará en modo espejo (útil para impresión en relieve).
+        stamp (bool): Si es True, usa un Form XObject por patrón de celda (PDF más pequeño).
+        workers (int): Número de procesos para dibujar rangos de páginas en paralelo.
+        profile (PageProfile): Hoja del documento.
+        contractions (ContractionTable or None): Tabla de Grado 2, o None para Grado 1.
+        backend (str): 'reportlab' o 'native' (ver render_braille_pdfs).
     Returns:
         BytesIO: Un objeto BytesIO que contiene el PDF generado.
     """
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
+    return render_braille_pdf(translate_text(text, profile, contractions), mirror=mirror, stamp=stamp, workers=workers,
+                              backend=backend)
 
-    # Posición inicial X: Margen izquierdo
-    x = LEFT_MARGIN_POINTS
-    # Posición inicial Y: La coordenada Y de la parte superior de la primera línea de braille.
-    # Esta 'y' representará la parte superior de la celda Braille actual.
-    y = height - TOP_MARGIN_POINTS
 
-    # Aplicar transformación de espejo si se solicita
-    if mirror:
-        c.translate(width, 0)
-        c.scale(-1, 1)
-
-    current_braille_line_count = 0 # Contador de líneas de braille generadas en la página actual
-    num_cells_in_current_braille_line = 0 # Contador de celdas en la línea de braille actual
-
-    # Función auxiliar para avanzar a la siguiente línea de braille
-    def move_to_next_braille_line():
-        nonlocal x, y, current_braille_line_count, num_cells_in_current_braille_line
-        x = LEFT_MARGIN_POINTS # Reiniciar X al margen izquierdo
-        
-        # Incrementar el contador de línea para obtener el índice de la siguiente línea
-        current_braille_line_count += 1 
-
-        # Aplicar ajuste para la nueva línea si el índice está dentro de los límites de LINE_ADJUSTMENTS
-        adjustment = 0.0
-        if current_braille_line_count < len(LINE_ADJUSTMENTS):
-            adjustment = LINE_ADJUSTMENTS[current_braille_line_count]
-        
-        y -= (CELL_ADVANCE_HEIGHT + adjustment) # Mover Y a la siguiente línea (restamos porque Y disminuye hacia abajo)
-        num_cells_in_current_braille_line = 0 # Reiniciar contador de celdas
-
-        # Manejo de salto de página
-        if current_braille_line_count >= MAX_LINES_PER_PAGE:
-            c.showPage() # Iniciar nueva página
-            y = height - TOP_MARGIN_POINTS # Reiniciar Y para la nueva página
-            current_braille_line_count = 0 # Reiniciar contador de líneas para la primera línea de la nueva página
-
-    # Iterar sobre cada carácter del texto de entrada
-    for char_index, char in enumerate(text):
-        if char == '\n':
-            # Si encontramos un salto de línea explícito, forzamos un avance a la siguiente línea de braille
-            # solo si la línea actual no está vacía o si es la primera línea (para evitar saltos dobles al inicio).
-            # Esta condición asegura que un '\n' siempre avance la línea, incluso si es el primer carácter.
-            # Y que un segundo '\n' consecutivo genere una línea vacía.
-            move_to_next_braille_line()
-            continue # Pasar al siguiente carácter
-
-        # Lógica para avanzar a la siguiente línea si la actual está llena
-        if num_cells_in_current_braille_line >= MAX_CELLS_PER_LINE:
-            move_to_next_braille_line()
-
-        # Determinar el binario braille y marcadores
-        braille_binary = None
-        is_uppercase = False
-        is_digit = False
-
-        # Procesamiento de mayúsculas, números y puntuación
-        if char.isupper():
-            is_uppercase = True
-            char_lower = char.lower()
-            if char_lower in braille_alphabet:
-                braille_binary = braille_alphabet[char_lower]
-        elif char.isdigit():
-            is_digit = True
-            if char in braille_numbers:
-                braille_binary = braille_numbers[char]
-        elif char in braille_punctuation:
-            braille_binary = braille_punctuation[char]
-        elif char.lower() in braille_alphabet: # Manejo de minúsculas y caracteres acentuados
-            braille_binary = braille_alphabet[char.lower()]
-        # Si el carácter no se puede mapear, simplemente se ignora.
-
-        # Dibujar el marcador de mayúsculas si es necesario
-        if is_uppercase:
-            braille_cell_data = _binary_to_braille(braille_uppercase_marker)
-            # Pasamos 'y' directamente, que ahora es la parte superior de la celda.
-            _draw_braille_cell(c, x, y, braille_cell_data)
-            x += CELL_ADVANCE_WIDTH
-            num_cells_in_current_braille_line += 1
-            # Verificar de nuevo si el marcador llenó la línea y necesita un salto de línea
-            if num_cells_in_current_braille_line >= MAX_CELLS_PER_LINE:
-                move_to_next_braille_line()
-
-        # Dibujar el marcador de número si es necesario
-        if is_digit:
-            braille_cell_data = _binary_to_braille(braille_number_marker)
-            # Pasamos 'y' directamente, que ahora es la parte superior de la celda.
-            _draw_braille_cell(c, x, y, braille_cell_data)
-            x += CELL_ADVANCE_WIDTH
-            num_cells_in_current_braille_line += 1
-            # Verificar de nuevo si el marcador llenó la línea y necesita un salto de línea
-            if num_cells_in_current_braille_line >= MAX_CELLS_PER_LINE:
-                move_to_next_braille_line()
-
-        # Dibujar el carácter braille real
-        if braille_binary:
-            braille_cell_data = _binary_to_braille(braille_binary)
-            # Pasamos 'y' directamente, que ahora es la parte superior de la celda.
-            _draw_braille_cell(c, x, y, braille_cell_data)
-            x += CELL_ADVANCE_WIDTH
-            num_cells_in_current_braille_line += 1
-    
-    # Asegurar que la última línea de braille se guarde, incluso si no llenó la página
-    c.save()
-    buffer.seek(0)
-    return buffer
+@_profiled
+def create_braille_pdf_pair(text, stamp=False, workers=1, profile=US_LETTER_PROFILE, contractions=None,
+                            backend='reportlab'):
+    """
+    Crea a la vez el PDF en modo espejo (para impresión) y el normal (para vista previa),
+    traduciendo y calculando la geometría de cada página una sola vez.
+    Args:
+        text (str): El texto de entrada a convertir.
+        stamp (bool): Si es True, usa un Form XObject por patrón de celda (PDF más pequeño).
+        workers (int): Número de procesos para dibujar rangos de páginas en paralelo.
+        profile (PageProfile): Hoja del documento.
+        contractions (ContractionTable or None): Tabla de Grado 2, o None para Grado 1.
+        backend (str): 'reportlab' o 'native' (ver render_braille_pdfs).
+    Returns:
+        tuple of BytesIO: (pdf_espejo, pdf_normal)
+    """
+    return render_braille_pdfs(translate_text(text, profile, contractions), (True, False), stamp=stamp, workers=workers,
+                               backend=backend)
+
+
+@_profiled
+def create_braille_pdf_pages(text, index, first, last=None, mirror=False, stamp=False, profile=US_LETTER_PROFILE,
+                             contractions=None, backend='reportlab'):
+    """
+    Crea un PDF con solo las páginas [first, last) del documento, traduciendo y dibujando
+    únicamente esas páginas (para reimprimir una hoja o partir un libro en volúmenes).
+    Args:
+        text (str): El texto completo del documento.
+        index (PageIndex): Índice de páginas del texto (ver PageIndex.from_stream y app.utils.cache).
+        first (int): Primera página (0-indexado).
+        last (int or None): Página siguiente a la última; None llega hasta el final.
+        mirror (bool): Si es True, el PDF se generará en modo espejo.
+        stamp (bool): Si es True, usa un Form XObject por patrón de celda (PDF más pequeño).
+        profile (PageProfile): Hoja del documento.
+        contractions (ContractionTable or None): Tabla de Grado 2, o None para Grado 1.
+        backend (str): 'reportlab' o 'native' (ver render_braille_pdfs).
+    Returns:
+        BytesIO: Las páginas pedidas, con el mismo dibujo que en el documento completo.
+    """
+    stream = translate_pages(text, index, first, last, profile, contractions)
+    return render_braille_pdf(stream, mirror=mirror, stamp=stamp, backend=backend, first_page=first)
+
+
+def _cell_form_content(cell):
+    """
+    Operadores PDF que dibujan una celda con su esquina superior izquierda en el origen.
+    """
+    path = PDFPathObject()
+    _draw_braille_cell(path, 0, 0, cell)
+    return (path.getCode() + ' B').encode('latin-1')
+
+
+@lru_cache(maxsize=None)
+def _mirror_transform(profile):
+    """
+    Operador PDF que refleja horizontalmente una página de la hoja indicada.
+    """
+    return ('-1 0 0 1 %s 0 cm\n' % fp_str(profile.width)).encode('latin-1')
 
 
+def _page_content(layout, page, stamp):
+    """
+    Operadores PDF de una página, con el mismo dibujo que render_braille_pdfs.
+    En modo espejo basta con anteponer _mirror_transform(profile).
+    """
+    operators = []
+    if stamp:
+        for x, y, cell in _page_placements(layout, page):
+            operators.append('q 1 0 0 1 %s cm /%s Do Q' % (fp_str(x, y), _cell_form_name(cell)))
+    else:
+        path = _page_path(layout, page)
+        if path is not None:
+            operators.append(path.getCode() + ' B')
+    return '\n'.join(operators).encode('latin-1')
+
+
+@_profiled
+def write_braille_pdfs(source, outputs, mirrors=(True, False), stamp=False, profile=US_LETTER_PROFILE,
+                       contractions=None):
+    """
+    Convierte texto a varios PDF Braille a la vez, uno por orientación, escribiendo
+    cada página en cuanto se completa. La memoria usada no depende de la longitud del texto.
+    Args:
+        source (iterable of str or file): Trozos de texto, o un archivo de texto abierto.
+        outputs (list): Ruta o flujo binario escribible de cada PDF.
+        mirrors (tuple of bool): Orientación de cada PDF; True genera el modo espejo.
+        stamp (bool): Si es True, usa un Form XObject por patrón de celda (PDF más pequeño).
+        profile (PageProfile): Hoja del documento.
+        contractions (ContractionTable or None): Tabla de Grado 2, o None para Grado 1.
+    Returns:
+        int: El número de páginas de cada PDF.
+    """
+    mirror_transform = _mirror_transform(profile)
+    with ExitStack() as stack:
+        writers = []
+        for output in outputs:
+            if isinstance(output, (str, os.PathLike)):
+                output = stack.enter_context(open(output, 'wb'))
+            writers.append(PdfStreamWriter(output, profile.pagesize))
+
+        for stream in iter_translate(source, profile, contractions):
+            with _stage('layout'):
+                first_page = writers[0].num_pages
+                layout = layout_cells(stream, first_page) if stamp else layout_dots(stream, first_page)
+            for page in range(stream.num_pages):
+                with _stage('draw'):
+                    if stamp:
+                        new_cells = set(layout.cells[slice(*layout.page_range(page))].tolist()) - {0}
+                        for cell in sorted(new_cells):
+                            if not writers[0].has_form(_cell_form_name(cell)):
+                                content = _cell_form_content(cell)
+                                for writer in writers:
+                                    writer.add_form(_cell_form_name(cell), _CELL_FORM_BBOX, content)
+                    content = _page_content(layout, page, stamp)
+                with _stage('serialize'):
+                    for writer, mirror in zip(writers, mirrors):
+                        writer.add_page(mirror_transform + content if mirror else content)
+            _count_drawing(stream)
+
+        with _stage('serialize'):
+            for writer in writers:
+                writer.close()
+    _count(output_bytes=sum(writer.bytes_written for writer in writers))
+    return writers[0].num_pages
+
+
+def write_braille_pdf(source, output, mirror=False, stamp=False, profile=US_LETTER_PROFILE, contractions=None):
+    """
+    Convierte texto a un PDF Braille escribiendo cada página en cuanto se completa.
+    La memoria usada no depende de la longitud del texto.
+    Args:
+        source (iterable of str or file): Trozos de texto, o un archivo de texto abierto.
+        output (str, PathLike or file): Ruta del PDF o flujo binario escribible.
+        mirror (bool): Si es True, el PDF se generará en modo espejo (útil para impresión en relieve).
+        stamp (bool): Si es True, usa un Form XObject por patrón de celda (PDF más pequeño).
+        profile (PageProfile): Hoja del documento.
+        contractions (ContractionTable or None): Tabla de Grado 2, o None para Grado 1.
+    Returns:
+        int: El número de páginas escritas.
+    """
+    return write_braille_pdfs(source, [output], (mirror,), stamp=stamp, profile=profile, contractions=contractions)
+
+
+# --- Maquetación incremental ---
+
+def _common_prefix_length(a, b, block=4096):
+    """
+    Longitud del prefijo común de dos cadenas, comparando por bloques.
+    """
+    limit = min(len(a), len(b))
+    length = 0
+    while length < limit:
+        end = min(length + block, limit)
+        if a[length:end] != b[length:end]:
+            break
+        length = end
+    while length < limit and a[length] == b[length]:
+        length += 1
+    return length
+
+
+def _common_suffix_length(a, b, limit, block=4096):
+    """
+    Longitud del sufijo común de dos cadenas, sin pasar de `limit` caracteres.
+    """
+    length = 0
+    while length < limit:
+        size = min(block, limit - length)
+        if a[len(a) - length - size:len(a) - length] != b[len(b) - length - size:len(b) - length]:
+            break
+        length += size
+    while length < limit and a[len(a) - length - 1] == b[len(b) - length - 1]:
+        length += 1
+    return length
+
+
+def _char_token_index(tokens, chars):
+    """
+    Índice de la primera ficha (incluidos sus marcadores) del carácter número `chars`.
+    """
+    if not chars:
+        return 0
+    codes = np.frombuffer(tokens, dtype=np.uint8)
+    return int(np.flatnonzero(codes & 0xC0 != MARKER_FLAG)[chars - 1]) + 1
+
+
+class _Page:
+    """
+    Una página de IncrementalDocument: sus celdas, su origen en el texto y su dibujo,
+    que se calcula la primera vez que hace falta.
+    """
+
+    __slots__ = ('stream', 'source', 'content', 'cells', 'compressed', 'verso')
+
+    def __init__(self, stream, source):
+        self.stream = stream
+        self.source = source
+        self.content = None
+        self.cells = None
+        self.compressed = {}
+        self.verso = False
+
+
+class IncrementalDocument:
+    """
+    Documento Braille que, al editar el texto, solo vuelve a maquetar las páginas afectadas.
+
+    Cada página guarda dónde empieza en el texto. Tras una edición, la traducción se
+    retoma desde la página que contiene el primer carácter cambiado y se detiene en cuanto
+    una página nueva empieza donde empezaba una antigua (desplazada por la edición):
+    a partir de ahí las páginas, y su dibujo ya calculado, se reutilizan.
+    """
+
+    # Caracteres del primer trozo que se traduce tras una edición; cada trozo siguiente dobla al anterior
+    FIRST_CHUNK_SIZE = RESUME_CHUNK_SIZE
+    # Imágenes de página que se conservan para la vista previa
+    IMAGE_CACHE_SIZE = 32
+
+    def __init__(self, text='', stamp=False, profile=US_LETTER_PROFILE, contractions=None):
+        """
+        Args:
+            text (str): Texto inicial.
+            stamp (bool): Si es True, usa un Form XObject por patrón de celda (PDF más pequeño).
+            profile (PageProfile): Hoja del documento.
+            contractions (ContractionTable or None): Tabla de Grado 2, o None para Grado 1.
+        """
+        self.stamp = stamp
+        self.profile = profile
+        self.contractions = contractions
+        self.text = text
+        self._pages = self._split_pages(translate_text(text, profile, contractions))
+        self._images = OrderedDict() # (página, dpi, espejo) -> imagen, de la menos a la más usada
+
+    @property
+    def num_pages(self):
+        return len(self._pages)
+
+    @property
+    def stream(self):
+        """CellStream con todas las páginas del documento."""
+        stream = join_streams(page.stream for page in self._pages)
+        stream.page_sources = [page.source for page in self._pages]
+        return stream
+
+    @staticmethod
+    def _split_pages(stream):
+        return [_Page(stream.page_slice(page, page + 1), source) for page, source in enumerate(stream.page_sources)]
+
+    def update(self, text):
+        """
+        Cambia el texto del documento, volviendo a maquetar solo lo necesario.
+        Args:
+            text (str): El texto completo después de la edición.
+        Returns:
+            tuple: Intervalo [primera, fin) de las páginas que se volvieron a maquetar.
+        """
+        with _stage('translate'):
+            return self._relayout(text)
+
+    def _relayout(self, text):
+        old_text = self.text
+        if text == old_text:
+            return len(self._pages), len(self._pages)
+        prefix = _common_prefix_length(old_text, text)
+        suffix = _common_suffix_length(old_text, text, min(len(old_text), len(text)) - prefix)
+        delta = len(text) - len(old_text)
+        self.text = text
+
+        edit_end = len(old_text) - suffix
+        contractions = self.contractions
+        if contractions is not None:
+            # Con contracciones, la edición puede cambiar toda la palabra que la contiene
+            prefix = contractions.word_start(text, prefix)
+            edit_end = contractions.word_end(old_text, edit_end)
+        # La página anterior a la que empieza en el primer carácter cambiado tampoco es segura:
+        # dónde termina depende de ese carácter.
+        first = max(0, bisect_left([page.source[0] for page in self._pages], prefix) - 1)
+        # Páginas antiguas en las que la nueva maquetación puede volver a alinearse
+        old_starts = {page.source: index for index, page in enumerate(self._pages[first + 1:], first + 1)
+                      if page.source[0] >= edit_end}
+
+        text_offset, skip = self._pages[first].source
+        paginator = _Paginator(track_sources=True, text_offset=text_offset, skip=skip, pages_before=first,
+                               profile=self.profile)
+        checked = 1 # La primera página nueva siempre coincide con la antigua
+        match = None
+        for _ in paginator.resume(text, contractions, chunk_size=self.FIRST_CHUNK_SIZE):
+            for index in range(checked, paginator.num_pages_started):
+                new_offset, new_skip = paginator.page_source(index)
+                old_index = old_starts.get((new_offset - delta, new_skip))
+                if old_index is not None:
+                    match = index, old_index
+                    break
+            checked = paginator.num_pages_started
+            if match is not None:
+                break
+
+        if match is None:
+            new_pages = self._split_pages(paginator.finish())
+            tail = []
+        else:
+            new_pages = self._split_pages(paginator.take_pages(limit=match[0]))
+            tail = self._pages[match[1]:]
+            for page in tail:
+                page.source = (page.source[0] + delta, page.source[1])
+        self._pages = self._pages[:first] + new_pages + tail
+        return first, first + len(new_pages)
+
+    def _is_verso(self, index):
+        return self.profile.verso is not None and index % 2 == 1
+
+    def _render(self, page, index):
+        # En interpunto, una edición que desplaza la página a la otra cara cambia su dibujo
+        verso = self._is_verso(index)
+        if page.content is None or page.verso != verso:
+            with _stage('draw'):
+                layout = layout_cells(page.stream, verso) if self.stamp else layout_dots(page.stream, verso)
+                page.content = _page_content(layout, 0, self.stamp)
+                page.cells = set(layout.cells.tolist()) - {0} if self.stamp else set()
+                page.compressed = {}
+                page.verso = verso
+            _count_drawing(page.stream)
+        return page
+
+    def page_stream(self, page):
+        """CellStream con solo la página indicada."""
+        return self._pages[page].stream
+
+    def page_image(self, page, dpi=72, mirror=False):
+        """
+        Imagen de una página para la vista previa (ver render_page_image).
+        Se dibuja la primera vez que se pide y se reutiliza mientras la página no cambie;
+        solo se guardan las IMAGE_CACHE_SIZE imágenes usadas más recientemente.
+        """
+        verso = self._is_verso(page)
+        key = (self._pages[page], dpi, mirror, verso)
+        image = self._images.get(key)
+        if image is None:
+            image = self._images[key] = render_page_image(key[0].stream, dpi=dpi, mirror=mirror, first_page=verso)
+            if len(self._images) > self.IMAGE_CACHE_SIZE:
+                self._images.popitem(last=False)
+        else:
+            self._images.move_to_end(key)
+        return image
+
+    def page_content(self, page, mirror=False):
+        """
+        Operadores PDF de una página, dibujada solo si cambió desde la última vez.
+        """
+        content = self._render(self._pages[page], page).content
+        return _mirror_transform(self.profile) + content if mirror else content
+
+    def to_pdf(self, mirror=False):
+        """
+        Genera el PDF del documento reutilizando el dibujo comprimido de las páginas sin cambios.
+        Args:
+            mirror (bool): Si es True, el PDF se generará en modo espejo (útil para impresión en relieve).
+        Returns:
+            BytesIO: Un objeto BytesIO que contiene el PDF generado.
+        """
+        buffer = BytesIO()
+        writer = PdfStreamWriter(buffer, self.profile.pagesize)
+        mirror_transform = _mirror_transform(self.profile)
+        pages = [self._render(page, index) for index, page in enumerate(self._pages)]
+        with _stage('serialize'):
+            if self.stamp:
+                for cell in sorted(set().union(*(page.cells for page in pages))):
+                    writer.add_form(_cell_form_name(cell), _CELL_FORM_BBOX, _cell_form_content(cell))
+            for page in pages:
+                data = page.compressed.get(mirror)
+                if data is None:
+                    data = page.compressed[mirror] = zlib.compress(mirror_transform + page.content if mirror else page.content)
+                writer.add_page(data, compressed=True)
+            writer.close()
+        _count(output_bytes=writer.bytes_written)
+        buffer.seek(0)
+        return buffer
+
+
+@_profiled
 def pdf_to_image(pdf_file, page_number=0):
     """
     Convierte la página especificada de un archivo PDF a una imagen PNG.
@@ -291,14 +1836,189 @@ def pdf_to_image(pdf_file, page_number=0):
     Returns:
         BytesIO: Un objeto BytesIO que contiene la imagen PNG.
     """
+    # PyMuPDF y PIL solo se importan cuando se pide una vista previa desde un PDF
+    import fitz # PyMuPDF
+    from PIL import Image
+
     # Asegúrate de que el buffer esté al inicio antes de leerlo
     pdf_file.seek(0)
-    doc = fitz.open(stream=pdf_file.read(), filetype="pdf")
-    page = doc.load_page(page_number)
-    pix = page.get_pixmap()
-    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format='PNG')
-    img_bytes.seek(0)
+    with _stage('open'):
+        doc = fitz.open(stream=pdf_file.read(), filetype="pdf")
+        page = doc.load_page(page_number)
+    with _stage('rasterize'):
+        pix = page.get_pixmap()
+    with _stage('encode_png'):
+        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        img_bytes = io.BytesIO()
+        img.save(img_bytes, format='PNG')
+        img_bytes.seek(0)
     doc.close() # Es buena práctica cerrar el documento
     return img_bytes
+
+
+# --- Vista previa directa ---
+
+# Muestras por eje y por píxel al calcular la cobertura de un punto
+_PREVIEW_SUPERSAMPLING = 4
+
+
+@lru_cache(maxsize=8)
+def _dot_stamp(radius):
+    """
+    Cobertura de un punto de `radius` píxeles centrado en el centro de un píxel.
+    Returns:
+        tuple of ndarray: (filas, columnas, gris) relativos al píxel central, solo de
+            los píxeles que el punto toca; gris va de 0 (cubierto) a 255.
+    """
+    extent = int(np.ceil(radius + 0.5))
+    pixels = np.arange(-extent, extent + 1)
+    samples = (pixels[:, None] + (np.arange(_PREVIEW_SUPERSAMPLING) + 0.5) / _PREVIEW_SUPERSAMPLING - 0.5).ravel()
+    inside = samples[:, None] ** 2 + samples[None, :] ** 2 <= radius ** 2
+    coverage = inside.reshape(len(pixels), _PREVIEW_SUPERSAMPLING,
+                              len(pixels), _PREVIEW_SUPERSAMPLING).mean(axis=(1, 3))
+    rows, columns = np.nonzero(coverage)
+    gray = np.rint(255 * (1 - coverage[rows, columns])).astype(np.uint8)
+    return pixels[rows], pixels[columns], gray
+
+
+def render_page_image(stream, page=0, dpi=72, mirror=False, first_page=0):
+    """
+    Dibuja una página directamente en una imagen, sin generar ni rasterizar un PDF.
+    Args:
+        stream (CellStream): Celdas paginadas devueltas por translate_text.
+        page (int): El número de página a dibujar (0-indexado).
+        dpi (float): Resolución de la imagen; 72 da el mismo tamaño que pdf_to_image.
+        mirror (bool): Si es True, la página se dibuja en modo espejo.
+        first_page (int): Número en el documento de la primera página del flujo (ver layout_cells).
+    Returns:
+        ndarray: Imagen en escala de grises (alto x ancho, uint8), que st.image muestra directamente.
+    """
+    with _stage('preview'):
+        return _rasterize_page(stream, page, dpi, mirror, first_page)
+
+
+def _rasterize_page(stream, page, dpi, mirror, first_page=0):
+    scale = dpi / INCHES_TO_POINTS
+    width, height = (int(round(size * scale)) for size in stream.profile.pagesize)
+    image = np.full((height, width), 255, dtype=np.uint8)
+    dots = layout_dots(stream.page_slice(page, page + 1), first_page + page)
+    if len(dots.x):
+        # El trazo de los puntos (1 punto de grosor) los agranda medio punto de radio
+        rows, columns, gray = _dot_stamp((POINT_RADIUS + 0.5) * scale)
+        center_rows = np.floor((stream.profile.height - dots.y) * scale).astype(np.intp)
+        center_columns = np.floor(dots.x * scale).astype(np.intp)
+        # Los puntos no se solapan, así que cada píxel se escribe una sola vez
+        pixel_rows = (center_rows[:, None] + rows).ravel()
+        pixel_columns = (center_columns[:, None] + columns).ravel()
+        visible = (pixel_rows >= 0) & (pixel_rows < height) & (pixel_columns >= 0) & (pixel_columns < width)
+        image[pixel_rows[visible], pixel_columns[visible]] = np.tile(gray, len(dots.x))[visible]
+    if mirror:
+        image = np.ascontiguousarray(image[:, ::-1])
+    return image
+
+
+def _verso_offset(value):
+    try:
+        x, y = (float(part) for part in value.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError('se esperaba X,Y en puntos: %r' % value)
+    return x, y
+
+
+def cli_profile(args):
+    """
+    Hoja elegida con --page-size, --interpoint y --verso-offset.
+    Args:
+        args (Namespace): Argumentos ya analizados de "convert" o "batch".
+    Returns:
+        PageProfile: La hoja de la conversión.
+    """
+    profile = PAGE_PROFILES[args.page_size]
+    if args.interpoint or args.verso_offset is not None:
+        profile = profile.with_interpoint(args.verso_offset)
+    return profile
+
+
+def main(argv=None):
+    """
+    Punto de entrada de línea de comandos:
+        python -m app.utils.braillebook convert texto.txt braille.pdf
+        python -m app.utils.braillebook batch in_dir out_dir
+        python -m app.utils.braillebook serve --port 8000
+    """
+    from app.utils.contractions import available_tables, load_table
+    tables = available_tables()
+    parser = argparse.ArgumentParser(prog='python -m app.utils.braillebook',
+                                     description='Conversión de texto a PDF Braille.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert = commands.add_parser('convert', help='Convierte un archivo .txt a PDF Braille.')
+    convert.add_argument('input', help='Archivo de texto (UTF-8).')
+    convert.add_argument('output', help='PDF de salida.')
+    convert.add_argument('--mirror', action='store_true', help='Genera el PDF en modo espejo.')
+    convert.add_argument('--no-stamp', dest='stamp', action='store_false',
+                         help='Dibuja cada punto en lugar de usar una forma por patrón de celda.')
+    convert.add_argument('--page-size', choices=sorted(PAGE_PROFILES), default='letter',
+                         help='Tamaño de hoja (por defecto, letter).')
+    convert.add_argument('--interpoint', action='store_true',
+                         help='Interpunto: páginas alternas en el recto y en el verso de cada hoja.')
+    convert.add_argument('--verso-offset', type=_verso_offset, default=None, metavar='X,Y',
+                         help='Desplazamiento del verso en puntos (por defecto, media línea hacia abajo).')
+    convert.add_argument('--contractions', choices=tables, default=None,
+                         help='Braille contraído (Grado 2) con la tabla indicada, p. ej. en-ueb-g2.')
+
+    batch = commands.add_parser('batch', help='Convierte todos los archivos .txt de un directorio.')
+    batch.add_argument('in_dir', help='Directorio con los archivos .txt.')
+    batch.add_argument('out_dir', help='Directorio donde se escriben los PDF.')
+    orientation = batch.add_mutually_exclusive_group()
+    orientation.add_argument('--mirror', dest='orientation', action='store_const', const='mirror',
+                             help='Solo el PDF en modo espejo (por defecto).')
+    orientation.add_argument('--normal', dest='orientation', action='store_const', const='normal',
+                             help='Solo el PDF normal.')
+    orientation.add_argument('--both', dest='orientation', action='store_const', const='both',
+                             help='Ambos PDF, en una sola pasada por archivo.')
+    batch.set_defaults(orientation='mirror')
+    batch.add_argument('--workers', type=int, default=None,
+                       help='Número de procesos (por defecto, todos los núcleos).')
+    batch.add_argument('--no-stamp', dest='stamp', action='store_false',
+                       help='Dibuja cada punto en lugar de usar una forma por patrón de celda.')
+    batch.add_argument('--page-size', choices=sorted(PAGE_PROFILES), default='letter',
+                       help='Tamaño de hoja (por defecto, letter).')
+    batch.add_argument('--interpoint', action='store_true',
+                       help='Interpunto: páginas alternas en el recto y en el verso de cada hoja.')
+    batch.add_argument('--verso-offset', type=_verso_offset, default=None, metavar='X,Y',
+                       help='Desplazamiento del verso en puntos (por defecto, media línea hacia abajo).')
+    batch.add_argument('--contractions', choices=tables, default=None,
+                       help='Braille contraído (Grado 2) con la tabla indicada, p. ej. en-ueb-g2.')
+    batch.add_argument('--check', choices=('mtime', 'hash'), default='mtime',
+                       help='Cómo saber si una salida está al día (por defecto, mtime).')
+    batch.add_argument('--force', action='store_true', help='Convierte aunque las salidas estén al día.')
+    batch.add_argument('--summary', default='-',
+                       help='Archivo donde añadir el resumen JSON lines (por defecto, la salida estándar).')
+
+    serve = commands.add_parser('serve', help='Servicio HTTP de conversión.')
+    serve.add_argument('--host', default='127.0.0.1', help='Dirección donde escuchar (por defecto, 127.0.0.1).')
+    serve.add_argument('--port', type=int, default=8000, help='Puerto (por defecto, 8000).')
+    serve.add_argument('--workers', type=int, default=None,
+                       help='Conversiones simultáneas (por defecto, todos los núcleos).')
+    serve.add_argument('--max-pending', type=int, default=None,
+                       help='Conversiones admitidas a la vez antes de responder 503 (por defecto, 4 por proceso).')
+    serve.add_argument('--sync-limit', type=int, default=200_000,
+                       help='Caracteres máximos de POST /convert (por defecto, 200000).')
+
+    args = parser.parse_args(argv)
+    if args.command == 'convert':
+        contractions = load_table(args.contractions) if args.contractions else None
+        write_braille_pdf(iter_text(args.input), args.output, mirror=args.mirror, stamp=args.stamp,
+                          profile=cli_profile(args), contractions=contractions)
+        return 0
+    # Importación diferida: estos módulos importan este
+    if args.command == 'serve':
+        from app.utils import service
+        return service.run(args)
+    from app.utils import batch as batch_command
+    return batch_command.run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
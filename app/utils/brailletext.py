@@ -0,0 +1,129 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Exportación a texto braille: BRF (braille ASCII norteamericano) y Unicode (bloque U+2800).
+Usa la misma traducción y paginación que los PDF, sin dibujar nada.
+"""
+
+import os
+
+import numpy as np
+
+from app.utils.braillebook import US_LETTER_PROFILE, iter_translate, translate_text
+
+
+# Carácter ASCII de cada celda en BRF, según los puntos que tiene
+_BRF_DOTS = {
+    ' ': '', '!': '2346', '"': '5', '#': '3456', '$': '1246', '%': '146', '&': '12346', "'": '3',
+    '(': '12356', ')': '23456', '*': '16', '+': '346', ',': '6', '-': '36', '.': '46', '/': '34',
+    '0': '356', '1': '2', '2': '23', '3': '25', '4': '256', '5': '26', '6': '235', '7': '2356',
+    '8': '236', '9': '35', ':': '156', ';': '56', '<': '126', '=': '123456', '>': '345', '?': '1456',
+    '@': '4', 'A': '1', 'B': '12', 'C': '14', 'D': '145', 'E': '15', 'F': '124', 'G': '1245',
+    'H': '125', 'I': '24', 'J': '245', 'K': '13', 'L': '123', 'M': '134', 'N': '1345', 'O': '135',
+    'P': '1234', 'Q': '12345', 'R': '1235', 'S': '234', 'T': '2345', 'U': '136', 'V': '1236',
+    'W': '2456', 'X': '1346', 'Y': '13456', 'Z': '1356', '[': '246', '\\': '1256', ']': '12456',
+    '^': '45', '_': '456',
+}
+
+
+def _brf_glyphs():
+    """
+    Tabla celda -> byte ASCII, indexada por el código de 6 bits de la celda.
+    """
+    glyphs = np.zeros((64, 1), dtype=np.uint8)
+    for char, dots in _BRF_DOTS.items():
+        glyphs[sum(1 << (int(dot) - 1) for dot in dots)] = ord(char)
+    return glyphs
+
+
+def _unicode_glyphs():
+    """
+    Tabla celda -> UTF-8 del carácter U+2800 + celda (el bit i es el punto i + 1 en ambos).
+    """
+    return np.frombuffer(''.join(chr(0x2800 + cell) for cell in range(64)).encode('utf-8'),
+                         dtype=np.uint8).reshape(64, 3)
+
+
+# Formato -> (tabla de celdas, fin de línea, fin de página)
+FORMATS = {
+    'brf': (_brf_glyphs(), b'\r\n', b'\f'),
+    'unicode': (_unicode_glyphs(), b'\n', b'\f'),
+}
+EXTENSIONS = {'brf': '.brf', 'unicode': '.txt'}
+
+
+def format_braille_text(stream, braille_format='brf'):
+    """
+    Escribe un flujo de celdas como texto braille, una línea de texto por línea braille.
+    Cada línea termina en fin de línea y cada página en un salto de página (\\f).
+    Args:
+        stream (CellStream): Celdas paginadas devueltas por translate_text.
+        braille_format (str): 'brf' (ASCII, líneas CRLF) o 'unicode' (UTF-8, líneas LF).
+    Returns:
+        bytes: El texto codificado.
+    """
+    glyphs, line_end, page_end = FORMATS[braille_format]
+    width = glyphs.shape[1]
+    data = glyphs[np.frombuffer(stream.cells, dtype=np.uint8)].tobytes()
+    line_bounds = [offset * width for offset in stream.line_offsets] + [len(data)]
+    page_bounds = list(stream.page_offsets) + [stream.num_lines]
+    parts = []
+    for first, last in zip(page_bounds, page_bounds[1:]):
+        for line in range(first, last):
+            parts.append(data[line_bounds[line]:line_bounds[line + 1]])
+            parts.append(line_end)
+        parts.append(page_end)
+    return b''.join(parts)
+
+
+def create_braille_text(text, braille_format='brf', profile=US_LETTER_PROFILE, contractions=None):
+    """
+    Convierte texto a BRF o a braille Unicode con la misma paginación que create_braille_pdf.
+    Args:
+        text (str): El texto de entrada a convertir.
+        braille_format (str): 'brf' o 'unicode'.
+        profile (PageProfile): Hoja que fija las celdas por línea y las líneas por página.
+        contractions (ContractionTable or None): Tabla de Grado 2, o None para Grado 1.
+    Returns:
+        bytes: El texto braille codificado.
+    """
+    return format_braille_text(translate_text(text, profile, contractions), braille_format)
+
+
+def write_braille_text(source, output, braille_format='brf', profile=US_LETTER_PROFILE, contractions=None):
+    """
+    Convierte texto a BRF o a braille Unicode escribiendo cada grupo de páginas en cuanto
+    se completa. La memoria usada no depende de la longitud del texto.
+    Args:
+        source (iterable of str or file): Trozos de texto, o un archivo de texto abierto.
+        output (str, PathLike or file): Ruta del archivo o flujo binario escribible.
+        braille_format (str): 'brf' o 'unicode'.
+        profile (PageProfile): Hoja que fija las celdas por línea y las líneas por página.
+        contractions (ContractionTable or None): Tabla de Grado 2, o None para Grado 1.
+    Returns:
+        int: El número de páginas escritas.
+    """
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, 'wb') as file:
+            return write_braille_text(source, file, braille_format, profile, contractions)
+    num_pages = 0
+    for stream in iter_translate(source, profile, contractions):
+        output.write(format_braille_text(stream, braille_format))
+        num_pages += stream.num_pages
+    return num_pages
@@ -0,0 +1,289 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Caché en disco, direccionada por contenido, de los PDF, sus índices de páginas y las
+vistas previas generadas.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from io import BytesIO
+
+from app.utils import braillebook
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'braillebook')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Cambiar este número invalida todo lo guardado cuando cambia el dibujo de las páginas
+CACHE_FORMAT_VERSION = 1
+# Antigüedad (segundos) a partir de la cual un archivo temporal es de una escritura interrumpida
+STALE_TEMP_SECONDS = 3600
+# Escrituras tras las que se vuelve a medir el directorio aunque la estimación no supere el presupuesto
+RESCAN_PUTS = 1024
+
+
+class DiskCache:
+    """
+    Almacén clave -> bytes en un directorio, con expulsión LRU por tamaño total.
+
+    Es seguro compartirlo entre procesos: cada entrada se escribe en un archivo
+    temporal y se publica con os.replace, y cada acierto actualiza su mtime,
+    que es lo que ordena la expulsión. Una entrada borrada por otro proceso
+    simplemente cuenta como fallo.
+
+    El directorio solo se recorre en la primera escritura, cuando el tamaño estimado
+    (el medido más lo escrito desde entonces) supera max_bytes, y cada RESCAN_PUTS
+    escrituras, para contar también lo que hayan guardado otros procesos.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None # Tamaño estimado; None hasta el primer recorrido
+        self._puts = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """
+        Returns:
+            bytes or None: El valor guardado, o None si no está en la caché.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key, data):
+        """
+        Guarda un valor y expulsa las entradas menos usadas si se supera el presupuesto.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix='.tmp-', delete=False) as file:
+            file.write(data)
+        os.replace(file.name, path)
+        self._puts += 1
+        if self._size is not None:
+            # Reemplazar una entrada cuenta de más; el siguiente recorrido corrige la estimación
+            self._size += len(data)
+        if self._size is None or self._size > self.max_bytes or self._puts >= RESCAN_PUTS:
+            self.evict()
+
+    def evict(self):
+        """
+        Mide el directorio y borra las entradas con mtime más antiguo hasta quedar dentro
+        de max_bytes. También borra los archivos temporales de escrituras interrumpidas.
+        """
+        entries = []
+        total = 0
+        stale = time.time() - STALE_TEMP_SECONDS
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    if name.startswith('.tmp-'):
+                        # Los recientes pueden ser escrituras en curso de otro proceso
+                        if stat.st_mtime < stale:
+                            os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        self._puts = 0
+        self._size = total
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._size = total
+
+
+_default_cache = None
+
+
+def default_cache():
+    """
+    Caché compartida del proceso. Se configura con las variables de entorno
+    BRAILLEBOOK_CACHE_DIR y BRAILLEBOOK_CACHE_BYTES.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DiskCache(os.environ.get('BRAILLEBOOK_CACHE_DIR', DEFAULT_CACHE_DIR),
+                                   int(os.environ.get('BRAILLEBOOK_CACHE_BYTES', DEFAULT_MAX_BYTES)))
+    return _default_cache
+
+
+def layout_parameters(profile=braillebook.US_LETTER_PROFILE):
+    """
+    Parámetros de maquetación que determinan el dibujo de un PDF.
+    """
+    return dict(profile.parameters(),
+                version=CACHE_FORMAT_VERSION,
+                dots=(braillebook.POINT_RADIUS, braillebook.COLUMN_SEPARATION, braillebook.ROW_SEPARATION))
+
+
+def pdf_key(text, mirror, stamp=False, profile=braillebook.US_LETTER_PROFILE, contractions=None, backend='reportlab'):
+    """
+    Clave de un PDF: hash del texto, la maquetación, las opciones de dibujo, la tabla de
+    contracciones y el backend que lo escribió.
+    """
+    options = dict(layout_parameters(profile), kind='pdf', mirror=mirror, stamp=stamp)
+    if contractions is not None:
+        options['contractions'] = contractions.digest
+    if backend != 'reportlab':
+        options['backend'] = backend
+    digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode('utf-8'))
+    digest.update(text.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+def page_index_key(text, profile=braillebook.US_LETTER_PROFILE, contractions=None):
+    """
+    Clave del índice de páginas de un texto: solo depende de la paginación, no del dibujo.
+    """
+    options = dict(layout_parameters(profile), kind='page-index')
+    if contractions is not None:
+        options['contractions'] = contractions.digest
+    digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode('utf-8'))
+    digest.update(text.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+def _put_page_index(cache, text, stream, profile, contractions):
+    index = braillebook.PageIndex.from_stream(stream, len(text))
+    cache.put(page_index_key(text, profile, contractions), index.to_bytes())
+    return index
+
+
+def cached_page_index(text, cache=None, profile=braillebook.US_LETTER_PROFILE, contractions=None):
+    """
+    Índice de páginas de un texto, guardado junto a sus PDF. Si no está en la caché,
+    solo se traduce el texto; no se dibuja nada.
+    Returns:
+        PageIndex: El índice de páginas del texto.
+    """
+    cache = cache or default_cache()
+    data = cache.get(page_index_key(text, profile, contractions))
+    if data is not None:
+        return braillebook.PageIndex.from_bytes(data)
+    return _put_page_index(cache, text, braillebook.translate_text(text, profile, contractions), profile, contractions)
+
+
+def cached_braille_pdf(text, mirror=False, stamp=False, cache=None, profile=braillebook.US_LETTER_PROFILE,
+                       contractions=None, backend='reportlab'):
+    """
+    Como create_braille_pdf, pero reutiliza el PDF si ya se generó con el mismo texto y maquetación.
+    Returns:
+        BytesIO: Un objeto BytesIO que contiene el PDF.
+    """
+    cache = cache or default_cache()
+    key = pdf_key(text, mirror, stamp, profile, contractions, backend)
+    data = cache.get(key)
+    if data is None:
+        stream = braillebook.translate_text(text, profile, contractions)
+        data = braillebook.render_braille_pdf(stream, mirror=mirror, stamp=stamp, backend=backend).getvalue()
+        cache.put(key, data)
+        _put_page_index(cache, text, stream, profile, contractions)
+    return BytesIO(data)
+
+
+def cached_braille_pdf_pair(text, stamp=False, cache=None, profile=braillebook.US_LETTER_PROFILE, contractions=None,
+                            backend='reportlab'):
+    """
+    Como create_braille_pdf_pair, pero reutiliza los PDF ya generados.
+    Returns:
+        tuple of BytesIO: (pdf_espejo, pdf_normal)
+    """
+    cache = cache or default_cache()
+    keys = tuple(pdf_key(text, mirror, stamp, profile, contractions, backend) for mirror in (True, False))
+    datas = [cache.get(key) for key in keys]
+    if None in datas:
+        stream = braillebook.translate_text(text, profile, contractions)
+        pair = braillebook.render_braille_pdfs(stream, (True, False), stamp=stamp, backend=backend)
+        datas = [buffer.getvalue() for buffer in pair]
+        for key, data in zip(keys, datas):
+            cache.put(key, data)
+        _put_page_index(cache, text, stream, profile, contractions)
+    return tuple(BytesIO(data) for data in datas)
+
+
+def cached_braille_pdf_pages(text, first, last=None, mirror=False, stamp=False, cache=None,
+                             profile=braillebook.US_LETTER_PROFILE, contractions=None, backend='reportlab'):
+    """
+    Como create_braille_pdf_pages, con el índice de páginas de la caché: una vez indexado
+    el texto, cada página o rango cuesta lo que sus propias páginas.
+    Returns:
+        BytesIO: Un objeto BytesIO que contiene el PDF de las páginas [first, last).
+    """
+    index = cached_page_index(text, cache, profile, contractions)
+    return braillebook.create_braille_pdf_pages(text, index, first, last, mirror=mirror, stamp=stamp, profile=profile,
+                                                contractions=contractions, backend=backend)
+
+
+def cached_document_pdf(document, mirror=False, cache=None):
+    """
+    Como IncrementalDocument.to_pdf, pero reutiliza el PDF si ya se generó con el mismo texto y
+    maquetación, por ejemplo en otra sesión; si no, se escribe con las páginas ya dibujadas del documento.
+    Returns:
+        BytesIO: Un objeto BytesIO que contiene el PDF.
+    """
+    cache = cache or default_cache()
+    key = pdf_key(document.text, mirror, document.stamp, document.profile, document.contractions, 'incremental')
+    data = cache.get(key)
+    if data is None:
+        data = document.to_pdf(mirror).getvalue()
+        cache.put(key, data)
+    return BytesIO(data)
+
+
+def cached_pdf_to_image(pdf_file, page_number=0, cache=None):
+    """
+    Como pdf_to_image, pero reutiliza la imagen si ya se generó para el mismo PDF y página.
+    Returns:
+        BytesIO: Un objeto BytesIO que contiene la imagen PNG.
+    """
+    cache = cache or default_cache()
+    pdf_file.seek(0)
+    digest = hashlib.sha256(b'png:%d:%d:' % (CACHE_FORMAT_VERSION, page_number))
+    digest.update(pdf_file.read())
+    key = digest.hexdigest()
+    data = cache.get(key)
+    if data is None:
+        data = braillebook.pdf_to_image(pdf_file, page_number).getvalue()
+        cache.put(key, data)
+    return BytesIO(data)
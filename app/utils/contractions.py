@@ -0,0 +1,317 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Braille contraído (Grado 2): tablas de contracciones compiladas en un trie.
+
+Las reglas de una tabla (app/utils/tables/<nombre>.txt) se compilan en un trie de
+caracteres. Cada palabra se recorre una sola vez de izquierda a derecha: en cada
+posición se toma la regla más larga que empieza ahí y que admite esa posición en la
+palabra (inicio, medio, final o palabra completa); si no hay ninguna, el carácter se
+traduce con la tabla de Grado 1. La traducción de cada palabra distinta se memoriza.
+
+Las fichas resultantes son las mismas que usa braillebook, y cada carácter sigue
+teniendo exactamente una ficha que no es marcador: una contracción de k caracteres
+en m celdas se escribe como k - m fichas sin celda seguidas de sus m celdas (y si
+m > k, las celdas sobrantes van delante como marcadores). Así la posición en el texto
+de cualquier ficha se sigue obteniendo restando los marcadores que la preceden.
+
+Las tablas compiladas se guardan en la caché en disco (app.utils.cache), así que
+cargar una tabla ya compilada no vuelve a analizar sus reglas.
+"""
+
+import hashlib
+import marshal
+import os
+import re
+from functools import lru_cache
+
+from app.utils.braillebook import MARKER_FLAG, _NO_CELL_TOKEN, _TRANSLATION_TABLE, braille_uppercase_marker, _binary_to_cell
+from app.utils.cache import default_cache
+
+
+TABLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
+# Cambiar este número invalida las tablas compiladas guardadas en la caché
+COMPILED_FORMAT_VERSION = 1
+# Palabras distintas cuya traducción se memoriza antes de vaciar la memoria
+WORD_MEMO_SIZE = 1 << 16
+
+# Posición de una coincidencia dentro de la palabra, como bit de la máscara de cada clase
+_MIDDLE, _BEGIN, _END, _WHOLE = 1, 2, 4, 8
+RULE_CLASSES = {
+    'always': _MIDDLE | _BEGIN | _END | _WHOLE,
+    'word': _WHOLE,
+    'begword': _BEGIN,
+    'midword': _MIDDLE,
+    'endword': _END,
+    'midendword': _MIDDLE | _END,
+}
+
+# Una palabra son letras, con apóstrofos solo entre letras ("don't"). Los ideogramas y la
+# kana no separan palabras con espacios ni tienen celda, así que cada uno va suelto.
+# Las reglas nunca salen de una palabra: el texto se puede cortar junto a cualquier otro carácter.
+_LETTER = r"[^\W\d_\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0003ffff]"
+_WORD = re.compile(r"({0}+(?:['’]{0}+)*)".format(_LETTER))
+# Caracteres que pueden formar parte de una palabra
+_WORD_CHAR = re.compile(r"{0}|['’]".format(_LETTER))
+_UPPERCASE_TOKEN = chr(MARKER_FLAG | _binary_to_cell(braille_uppercase_marker))
+
+
+def _parse_cells(dots):
+    """'5-145' -> [16, 25]: una celda de 6 bits por grupo de puntos."""
+    cells = []
+    for group in dots.split('-'):
+        if not group or not set(group) <= set('123456'):
+            raise ValueError('Puntos no válidos: %r' % dots)
+        cells.append(sum(1 << (int(dot) - 1) for dot in set(group)))
+    return cells
+
+
+def _rule_tokens(text, cells):
+    """
+    Fichas de una regla: una ficha que no es marcador por cada carácter del texto.
+    """
+    extra = len(cells) - len(text)
+    if extra > 0:
+        tokens = bytes(MARKER_FLAG | cell for cell in cells[:extra]) + bytes(cells[extra:])
+    else:
+        tokens = _NO_CELL_TOKEN * -extra + bytes(cells)
+    return tokens.decode('latin-1')
+
+
+def parse_rules(source, name='<tabla>'):
+    """
+    Analiza el texto de una tabla de contracciones.
+    Args:
+        source (str): Una regla por línea: <clase> <texto> <puntos>; '#' empieza un comentario.
+        name (str): Nombre de la tabla, para los mensajes de error.
+    Returns:
+        list of tuple: (texto, máscara de posiciones, fichas) de cada regla, en orden.
+    """
+    rules = []
+    for number, line in enumerate(source.splitlines(), 1):
+        fields = line.split('#', 1)[0].split()
+        if not fields:
+            continue
+        if len(fields) != 3 or fields[0] not in RULE_CLASSES:
+            raise ValueError('%s:%d: regla no válida: %r' % (name, number, line))
+        rule_class, text, dots = fields
+        if text != text.lower() or not _WORD.fullmatch(text):
+            raise ValueError('%s:%d: el texto debe ser una palabra en minúsculas: %r' % (name, number, text))
+        try:
+            cells = _parse_cells(dots)
+        except ValueError as error:
+            raise ValueError('%s:%d: %s' % (name, number, error)) from None
+        rules.append((text, RULE_CLASSES[rule_class], _rule_tokens(text, cells)))
+    return rules
+
+
+def compile_rules(rules):
+    """
+    Compila las reglas en un trie plano, serializable con marshal.
+    Returns:
+        tuple: (nodos, aceptaciones). nodos[i] es un dict carácter -> nodo hijo (el 0 es la
+            raíz); aceptaciones[i] es una tupla de (máscara, fichas) de las reglas que
+            terminan en el nodo i, por orden de aparición en la tabla.
+    """
+    nodes = [{}]
+    accepts = [[]]
+    for text, mask, tokens in rules:
+        node = 0
+        for char in text:
+            child = nodes[node].get(char)
+            if child is None:
+                child = nodes[node][char] = len(nodes)
+                nodes.append({})
+                accepts.append([])
+            node = child
+        accepts[node].append((mask, tokens))
+    return nodes, [tuple(accept) for accept in accepts]
+
+
+class ContractionTable:
+    """
+    Tabla de contracciones compilada. Se pasa como `contractions` a translate_text
+    y a las demás funciones de conversión de braillebook.
+
+    Atributos:
+        name (str): Nombre de la tabla.
+        digest (str): Hash de las reglas; identifica la tabla en las claves de caché.
+    """
+
+    def __init__(self, name, digest, nodes, accepts):
+        self.name = name
+        self.digest = digest
+        self._nodes = nodes
+        self._accepts = accepts
+        self._words = {}
+
+    def __repr__(self):
+        return 'ContractionTable(%r)' % self.name
+
+    def __reduce__(self):
+        return (load_table, (self.name,))
+
+    def _lowercase_word_tokens(self, word):
+        nodes, accepts = self._nodes, self._accepts
+        length = len(word)
+        parts = []
+        position = 0
+        while position < length:
+            # Recorre el trie desde la posición actual y se queda con la regla válida más larga
+            node = 0
+            best = None
+            index = position
+            while index < length:
+                node = nodes[node].get(word[index])
+                if node is None:
+                    break
+                index += 1
+                if accepts[node]:
+                    where = ((_BEGIN if position == 0 else 0) | (_END if index == length else 0)) or _MIDDLE
+                    if where == _BEGIN | _END:
+                        where = _WHOLE
+                    for mask, tokens in accepts[node]:
+                        if mask & where:
+                            best = index, tokens
+                            break
+            if best is None:
+                parts.append(word[position].translate(_TRANSLATION_TABLE))
+                position += 1
+            else:
+                position, tokens = best
+                parts.append(tokens)
+        return ''.join(parts)
+
+    def word_tokens(self, word):
+        """
+        Fichas de una palabra (como cadena latin-1). Las palabras en minúsculas o con solo
+        la inicial en mayúscula se contraen; las demás se traducen letra a letra.
+        """
+        tokens = self._words.get(word)
+        if tokens is None:
+            lower = word.lower()
+            if len(lower) != len(word):
+                tokens = word.translate(_TRANSLATION_TABLE)
+            elif lower == word:
+                tokens = self._lowercase_word_tokens(word)
+            elif word[0].isupper() and word[1:] == lower[1:]:
+                tokens = _UPPERCASE_TOKEN + self._lowercase_word_tokens(lower)
+            else:
+                tokens = word.translate(_TRANSLATION_TABLE)
+            if len(self._words) >= WORD_MEMO_SIZE:
+                self._words.clear()
+            self._words[word] = tokens
+        return tokens
+
+    def translate(self, text):
+        """
+        Traduce un texto a fichas, como text.translate(_TRANSLATION_TABLE) pero contrayendo
+        cada palabra. Pasa una sola vez por el texto.
+        Returns:
+            bytes: Las fichas del texto.
+        """
+        pieces = _WORD.split(text)
+        # split con un grupo alterna separaciones (índices pares) y palabras (impares)
+        pieces[0::2] = [gap.translate(_TRANSLATION_TABLE) for gap in pieces[0::2]]
+        pieces[1::2] = [self.word_tokens(word) for word in pieces[1::2]]
+        return ''.join(pieces).encode('latin-1')
+
+    @staticmethod
+    def word_start(text, index):
+        """
+        Última posición <= index donde se puede empezar a traducir sin partir una palabra.
+        """
+        while index > 0 and _inside_word(text, index):
+            index -= 1
+        return index
+
+    @staticmethod
+    def word_end(text, index):
+        """
+        Primera posición >= index donde se puede cortar el texto sin partir una palabra.
+        """
+        while index < len(text) and _inside_word(text, index):
+            index += 1
+        return index
+
+    def whole_word_chunks(self, chunks):
+        """
+        Reagrupa trozos de texto para que ninguno termine a mitad de una palabra.
+        Solo se retiene la palabra que queda abierta al final de cada trozo.
+        """
+        tail = ''
+        for chunk in chunks:
+            # Dentro de la cola retenida no hay ningún corte posible: solo se busca desde su final
+            start = len(tail)
+            chunk = tail + chunk
+            cut = len(chunk)
+            while cut >= start and cut > 0 and _inside_word(chunk, cut):
+                cut -= 1
+            if cut < start:
+                cut = 0
+            tail = chunk[cut:]
+            if cut:
+                yield chunk[:cut]
+        if tail:
+            yield tail
+
+
+def _inside_word(text, index):
+    """
+    True si cortar el texto en index podría partir una palabra. Al final del texto no se
+    sabe qué viene después, así que basta con que el carácter anterior pueda ser de una palabra.
+    """
+    return (index > 0 and _WORD_CHAR.match(text, index - 1) is not None
+            and (index == len(text) or _WORD_CHAR.match(text, index) is not None))
+
+
+def available_tables():
+    """Nombres de las tablas de contracciones incluidas."""
+    return sorted(name[:-4] for name in os.listdir(TABLES_DIR) if name.endswith('.txt'))
+
+
+@lru_cache(maxsize=None)
+def load_table(name):
+    """
+    Carga una tabla de contracciones, compilándola solo si no está ya en la caché en disco.
+    Args:
+        name (str): Nombre de la tabla (ver available_tables), p. ej. 'en-ueb-g2'.
+    Returns:
+        ContractionTable: La tabla compilada.
+    """
+    with open(os.path.join(TABLES_DIR, name + '.txt'), 'rb') as file:
+        source = file.read()
+    digest = hashlib.sha256(b'contractions:%d:' % COMPILED_FORMAT_VERSION + source).hexdigest()
+    try:
+        cache = default_cache()
+        data = cache.get(digest)
+    except OSError:
+        cache = data = None
+    if data is not None:
+        try:
+            return ContractionTable(name, digest, *marshal.loads(data))
+        except (EOFError, ValueError, TypeError):
+            pass # Entrada dañada: se vuelve a compilar
+    compiled = compile_rules(parse_rules(source.decode('utf-8'), name))
+    if cache is not None:
+        try:
+            cache.put(digest, marshal.dumps(compiled))
+        except OSError:
+            pass
+    return ContractionTable(name, digest, *compiled)
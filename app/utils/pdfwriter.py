@@ -0,0 +1,125 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+import zlib
+
+from reportlab.lib.rl_accel import fp_str
+
+
+class PdfStreamWriter:
+    """
+    Escritor mínimo de PDF que vuelca cada objeto al flujo de salida en cuanto se añade.
+    Solo guarda en memoria la posición de cada objeto, así que el tamaño del documento
+    no limita la memoria. Todas las páginas comparten un diccionario de recursos que
+    se escribe al cerrar, junto con el árbol de páginas y la tabla xref.
+    """
+
+    _CATALOG = 1
+    _PAGES = 2
+    _RESOURCES = 3
+
+    def __init__(self, output, pagesize, compress=True):
+        """
+        Args:
+            output: Flujo binario escribible (no hace falta que admita seek).
+            pagesize (tuple): Ancho y alto de página en puntos.
+            compress (bool): Si es True, los flujos de contenido se comprimen con Flate.
+        """
+        self._output = output
+        self._position = 0
+        self._offsets = [None] * (self._RESOURCES + 1) # Posición de cada objeto; el 0 no se usa
+        self._page_objects = []
+        self._forms = {}
+        self._pagesize = pagesize
+        self._compress = compress
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    @property
+    def num_pages(self):
+        return len(self._page_objects)
+
+    @property
+    def bytes_written(self):
+        return self._position
+
+    def _write(self, data):
+        self._output.write(data)
+        self._position += len(data)
+
+    def _new_object(self):
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _write_object(self, number, body):
+        self._offsets[number] = self._position
+        self._write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+
+    def _write_stream(self, number, entries, data, compressed=False):
+        if self._compress or compressed:
+            if not compressed:
+                data = zlib.compress(data)
+            entries += b' /Filter /FlateDecode'
+        self._write_object(number, b'<< %s /Length %d >>\nstream\n%s\nendstream' % (entries, len(data), data))
+
+    def has_form(self, name):
+        return name in self._forms
+
+    def add_form(self, name, bbox, content):
+        """
+        Escribe un Form XObject que las páginas pueden usar con "/name Do".
+        Args:
+            name (str): Nombre del recurso.
+            bbox (tuple): Recuadro (x0, y0, x1, y1) de la forma.
+            content (bytes): Operadores de dibujo de la forma.
+        """
+        number = self._new_object()
+        self._write_stream(number, b'/Type /XObject /Subtype /Form /BBox [%s]' % fp_str(*bbox).encode('ascii'), content)
+        self._forms[name] = number
+
+    def add_page(self, content, compressed=False):
+        """
+        Escribe una página completa.
+        Args:
+            content (bytes): Operadores de dibujo de la página.
+            compressed (bool): Si es True, `content` ya viene comprimido con zlib.compress,
+                por ejemplo porque se guardó de una escritura anterior.
+        """
+        contents = self._new_object()
+        self._write_stream(contents, b'', content, compressed)
+        page = self._new_object()
+        self._write_object(page, b'<< /Type /Page /Parent %d 0 R /Resources %d 0 R /MediaBox [0 0 %s] /Contents %d 0 R >>'
+                           % (self._PAGES, self._RESOURCES, fp_str(*self._pagesize).encode('ascii'), contents))
+        self._page_objects.append(page)
+
+    def close(self):
+        """
+        Escribe los recursos, el árbol de páginas, el catálogo y la tabla xref.
+        No cierra el flujo de salida.
+        """
+        xobjects = b' '.join(b'/%s %d 0 R' % (name.encode('ascii'), number) for name, number in self._forms.items())
+        self._write_object(self._RESOURCES, b'<< /ProcSet [/PDF] /XObject << %s >> >>' % xobjects)
+        kids = b' '.join(b'%d 0 R' % number for number in self._page_objects)
+        self._write_object(self._PAGES, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(self._page_objects)))
+        self._write_object(self._CATALOG, b'<< /Type /Catalog /Pages %d 0 R >>' % self._PAGES)
+
+        xref_position = self._position
+        self._write(b'xref\n0 %d\n0000000000 65535 f \n' % len(self._offsets))
+        for offset in self._offsets[1:]:
+            self._write(b'%010d 00000 n \n' % offset)
+        self._write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                    % (len(self._offsets), self._CATALOG, xref_position))
@@ -0,0 +1,406 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Servicio HTTP de conversión: una aplicación ASGI sin dependencias y un servidor
+asyncio mínimo para ejecutarla sin instalar nada más.
+
+Rutas:
+    POST /convert             Convierte un texto corto y devuelve el resultado directamente.
+    POST /jobs                Encola un texto de cualquier tamaño; responde 202 con el id del trabajo.
+    GET  /jobs/{id}           Estado del trabajo en JSON.
+    GET  /jobs/{id}/result    Resultado del trabajo terminado.
+
+El cuerpo de POST es el texto en UTF-8. Parámetros de consulta: format (pdf, brf o unicode),
+mirror (1 o 0), stamp (1 o 0), page (letter o a4), interpoint (1 o 0, hoja impresa por las dos caras),
+contractions (nombre de una tabla de Grado 2, p. ej. en-ueb-g2) y backend (reportlab o native).
+Las conversiones se ejecutan en un grupo de procesos acotado, así que el bucle de eventos nunca se
+bloquea dibujando con ReportLab.
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs
+
+from app.utils.braillebook import PAGE_PROFILES, PDF_BACKENDS, create_braille_pdf
+from app.utils.brailletext import FORMATS, create_braille_text
+from app.utils.contractions import available_tables, load_table
+from app.utils.workers import warm_pool
+
+
+# Caracteres máximos de POST /convert; los textos más largos deben usar /jobs
+SYNC_LIMIT = 200_000
+# Bytes máximos del cuerpo de una petición
+MAX_BODY_BYTES = 64 << 20
+# Segundos que se conservan los trabajos terminados
+JOB_TTL = 600
+
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'brf': 'text/plain',
+    'unicode': 'text/plain; charset=utf-8',
+}
+
+_REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+def _convert(text, braille_format, mirror, stamp, page_size, contractions, backend, interpoint=False):
+    """
+    Tarea de un proceso de trabajo: devuelve los bytes convertidos y los segundos que tardó.
+    """
+    start = time.perf_counter()
+    profile = PAGE_PROFILES[page_size]
+    if interpoint:
+        profile = profile.with_interpoint()
+    table = load_table(contractions) if contractions else None
+    if braille_format == 'pdf':
+        data = create_braille_pdf(text, mirror=mirror, stamp=stamp, profile=profile, contractions=table,
+                                  backend=backend).getvalue()
+    else:
+        data = create_braille_text(text, braille_format, profile, table)
+    return data, time.perf_counter() - start
+
+
+class _Job:
+    __slots__ = ('id', 'options', 'status', 'submitted', 'started', 'finished',
+                 'convert_seconds', 'result', 'error', 'task')
+
+    def __init__(self, options):
+        self.id = uuid.uuid4().hex
+        self.options = options
+        self.status = 'queued'
+        self.submitted = time.perf_counter()
+        self.started = self.finished = None
+        self.convert_seconds = None
+        self.result = self.error = self.task = None
+
+    def describe(self):
+        info = {'id': self.id, 'status': self.status, 'format': self.options[0]}
+        if self.finished is not None:
+            info['queue_seconds'] = round(self.started - self.submitted, 6)
+            info['convert_seconds'] = round(self.convert_seconds, 6) if self.convert_seconds is not None else None
+            if self.result is not None:
+                info['bytes'] = len(self.result)
+        if self.error is not None:
+            info['error'] = self.error
+        return info
+
+
+class _HTTPError(Exception):
+    def __init__(self, status, message, headers=()):
+        super().__init__(message)
+        self.status = status
+        self.headers = list(headers)
+
+
+class ConversionService:
+    """
+    Aplicación ASGI de conversión con un grupo de procesos y una cola de trabajos acotados.
+    """
+
+    def __init__(self, workers=None, max_pending=None, sync_limit=SYNC_LIMIT, job_ttl=JOB_TTL):
+        """
+        Args:
+            workers (int or None): Conversiones simultáneas (procesos); None usa todos los núcleos.
+            max_pending (int or None): Conversiones admitidas a la vez, en cola o en curso,
+                contando las síncronas; por encima se responde 503. None usa 4 por proceso.
+            sync_limit (int): Caracteres máximos de POST /convert.
+            job_ttl (float): Segundos que se conservan los trabajos terminados.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.workers
+        self.sync_limit = sync_limit
+        self.job_ttl = job_ttl
+        self._executor = None
+        self._slots = None
+        self._pending = 0
+        self._jobs = {}
+
+    def start(self, wait=False):
+        """
+        Arranca el grupo de procesos calientes; con wait=True espera a que estén listos,
+        para que la primera petición no pague la importación ni la preparación de tablas.
+        """
+        if self._executor is None:
+            self._executor = warm_pool(self.workers, wait=wait)
+            self._slots = asyncio.Semaphore(self.workers)
+
+    def _replace_pool(self, broken):
+        """
+        Sustituye un grupo de procesos roto (un proceso murió) por uno nuevo, para que
+        solo fallen las conversiones que estaban en curso y no todas las siguientes.
+        """
+        if self._executor is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = warm_pool(self.workers, wait=False)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        start = time.perf_counter()
+        self.start()
+        try:
+            status, body, content_type, timings, headers = await self._route(scope, receive)
+        except _HTTPError as error:
+            status, content_type, timings, headers = error.status, 'application/json', {}, error.headers
+            body = json.dumps({'error': str(error)}).encode('utf-8')
+        except Exception as error:
+            # Un fallo de la conversión también recibe respuesta, como los trabajos de /jobs
+            status, content_type, timings, headers = 500, 'application/json', {}, []
+            body = json.dumps({'error': f"{type(error).__name__}: {error}"}).encode('utf-8')
+        timings['total'] = time.perf_counter() - start
+        headers += [
+            (b'content-type', content_type.encode('latin-1')),
+            (b'content-length', b'%d' % len(body)),
+            (b'server-timing', ', '.join('%s;dur=%.3f' % (name, seconds * 1000)
+                                         for name, seconds in timings.items()).encode('latin-1')),
+            (b'x-process-time', b'%.6f' % timings['total']),
+        ]
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _route(self, scope, receive):
+        method = scope['method']
+        parts = [part for part in scope['path'].split('/') if part]
+        if parts == ['convert']:
+            self._require(method, 'POST')
+            return await self._convert_now(scope, receive)
+        if parts == ['jobs']:
+            self._require(method, 'POST')
+            return await self._submit(scope, receive)
+        if len(parts) in (2, 3) and parts[0] == 'jobs' and parts[2:] in ([], ['result']):
+            self._require(method, 'GET')
+            job = self._jobs.get(parts[1])
+            if job is None:
+                raise _HTTPError(404, 'Trabajo desconocido.')
+            if len(parts) == 2:
+                return 200, json.dumps(job.describe()).encode('utf-8'), 'application/json', {}, []
+            if job.status == 'error':
+                raise _HTTPError(500, job.error)
+            if job.status != 'done':
+                raise _HTTPError(409, 'El trabajo aún no ha terminado.')
+            timings = {'queue': job.started - job.submitted, 'convert': job.convert_seconds}
+            return 200, job.result, CONTENT_TYPES[job.options[0]], timings, []
+        raise _HTTPError(404, 'Ruta desconocida.')
+
+    @staticmethod
+    def _require(method, expected):
+        if method != expected:
+            raise _HTTPError(405, 'Método no permitido.', [(b'allow', expected.encode('latin-1'))])
+
+    @staticmethod
+    async def _read_text(receive):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            size += len(chunks[-1])
+            if size > MAX_BODY_BYTES:
+                raise _HTTPError(413, 'Cuerpo demasiado grande.')
+            if not message.get('more_body', False):
+                break
+        try:
+            return b''.join(chunks).decode('utf-8')
+        except UnicodeDecodeError:
+            raise _HTTPError(400, 'El cuerpo debe ser texto UTF-8.')
+
+    @staticmethod
+    def _options(scope):
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        braille_format = query.get('format', ['pdf'])[-1]
+        if braille_format != 'pdf' and braille_format not in FORMATS:
+            raise _HTTPError(400, 'Formato desconocido: %s.' % braille_format)
+        page_size = query.get('page', ['letter'])[-1]
+        if page_size not in PAGE_PROFILES:
+            raise _HTTPError(400, 'Tamaño de hoja desconocido: %s.' % page_size)
+        contractions = query.get('contractions', [''])[-1] or None
+        if contractions is not None and contractions not in available_tables():
+            raise _HTTPError(400, 'Tabla de contracciones desconocida: %s.' % contractions)
+        backend = query.get('backend', ['reportlab'])[-1]
+        if backend not in PDF_BACKENDS:
+            raise _HTTPError(400, 'Backend de PDF desconocido: %s.' % backend)
+        flag = lambda name, default: query.get(name, [default])[-1] not in ('0', 'false', 'no')
+        return (braille_format, flag('mirror', '0'), flag('stamp', '1'), page_size, contractions, backend,
+                flag('interpoint', '0'))
+
+    def _admit(self):
+        # Contrapresión: con la cola llena se rechaza en lugar de acumular trabajo sin límite
+        if self._pending >= self.max_pending:
+            raise _HTTPError(503, 'Demasiadas conversiones en curso; inténtalo más tarde.', [(b'retry-after', b'1')])
+        self._pending += 1
+
+    async def _run(self, text, options, job=None):
+        """
+        Ejecuta una conversión admitida en el grupo de procesos.
+        Returns:
+            tuple: (bytes, segundos en cola, segundos de conversión)
+        """
+        submitted = time.perf_counter()
+        try:
+            async with self._slots:
+                queued = time.perf_counter() - submitted
+                if job is not None:
+                    job.status = 'running'
+                    job.started = time.perf_counter()
+                loop = asyncio.get_running_loop()
+                executor = self._executor
+                try:
+                    data, seconds = await loop.run_in_executor(executor, _convert, text, *options)
+                except BrokenProcessPool:
+                    self._replace_pool(executor)
+                    raise
+        finally:
+            self._pending -= 1
+        return data, queued, seconds
+
+    async def _convert_now(self, scope, receive):
+        options = self._options(scope)
+        text = await self._read_text(receive)
+        if len(text) > self.sync_limit:
+            raise _HTTPError(413, 'Texto de más de %d caracteres: usa POST /jobs.' % self.sync_limit)
+        self._admit()
+        data, queued, seconds = await self._run(text, options)
+        return 200, data, CONTENT_TYPES[options[0]], {'queue': queued, 'convert': seconds}, []
+
+    async def _submit(self, scope, receive):
+        options = self._options(scope)
+        text = await self._read_text(receive)
+        self._prune()
+        self._admit()
+        job = _Job(options)
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run_job(job, text))
+        body = json.dumps(job.describe()).encode('utf-8')
+        return 202, body, 'application/json', {}, [(b'location', ('/jobs/%s' % job.id).encode('latin-1'))]
+
+    async def _run_job(self, job, text):
+        try:
+            job.result, _, job.convert_seconds = await self._run(text, job.options, job)
+            job.status = 'done'
+        except Exception as error:
+            job.error = f"{type(error).__name__}: {error}"
+            job.status = 'error'
+        job.finished = time.perf_counter()
+        job.started = job.started or job.finished
+        job.task = None
+
+    def _prune(self):
+        now = time.perf_counter()
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and now - job.finished > self.job_ttl]:
+            del self._jobs[job_id]
+
+
+async def _handle_connection(app, reader, writer):
+    """
+    Atiende una petición HTTP/1.1 por conexión y se la pasa a la aplicación ASGI.
+    """
+    try:
+        request_line = await reader.readline()
+        method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        headers = []
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers.append((name.strip().lower().encode('latin-1'), value.strip().encode('latin-1')))
+        length = int(dict(headers).get(b'content-length', b'0'))
+        if length > MAX_BODY_BYTES:
+            raise ValueError('body too large')
+        body = await reader.readexactly(length)
+    except (ValueError, asyncio.IncompleteReadError):
+        writer.write(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+        await writer.drain()
+        writer.close()
+        return
+
+    path, _, query = target.partition('?')
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+             'path': path, 'raw_path': path.encode('latin-1'), 'query_string': query.encode('latin-1'),
+             'headers': headers, 'server': writer.get_extra_info('sockname'),
+             'client': writer.get_extra_info('peername')}
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status = message['status']
+            lines = ['HTTP/1.1 %d %s' % (status, _REASONS.get(status, ''))]
+            lines += ['%s: %s' % (name.decode('latin-1'), value.decode('latin-1')) for name, value in message['headers']]
+            lines.append('Connection: close')
+            writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        elif message['type'] == 'http.response.body':
+            writer.write(message.get('body', b''))
+            await writer.drain()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        writer.close()
+
+
+async def serve(app, host='127.0.0.1', port=8000):
+    """
+    Sirve una aplicación ASGI con asyncio, sin dependencias externas.
+    """
+    server = await asyncio.start_server(lambda reader, writer: _handle_connection(app, reader, writer), host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def run(args):
+    """
+    Ejecuta el subcomando "serve" con los argumentos ya analizados.
+    """
+    app = ConversionService(workers=args.workers, max_pending=args.max_pending, sync_limit=args.sync_limit)
+    app.start(wait=True)
+    print(f"Sirviendo en http://{args.host}:{args.port}", flush=True)
+    try:
+        asyncio.run(serve(app, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.close()
+    return 0
@@ -0,0 +1,98 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Lectura de archivos de texto grandes sin cargarlos enteros en memoria.
+
+El archivo se mapea en memoria (mmap) y se decodifica en UTF-8 por trozos con un
+decodificador incremental, así que un carácter partido entre dos trozos se decodifica
+bien y nunca hay en memoria más que un trozo decodificado a la vez. Los finales de
+línea '\\r\\n' y '\\r' se convierten en '\\n', igual que al abrir el archivo en modo texto.
+"""
+
+import codecs
+import io
+import mmap
+
+
+# Bytes que se decodifican de una vez
+CHUNK_BYTES = 1 << 20
+# madvise no existe en todas las plataformas (p. ej. Windows)
+_MADVISE = hasattr(mmap.mmap, 'madvise') and hasattr(mmap, 'MADV_DONTNEED')
+
+
+def iter_text(path, chunk_bytes=CHUNK_BYTES, encoding='utf-8'):
+    """
+    Recorre el texto de un archivo por trozos, para pasarlo a write_braille_pdf,
+    write_braille_text o iter_translate.
+    Args:
+        path (str): Ruta del archivo.
+        chunk_bytes (int): Bytes del archivo decodificados en cada trozo.
+        encoding (str): Codificación del archivo.
+    Yields:
+        str: Trozos consecutivos del texto.
+    """
+    with open(path, 'rb') as file:
+        try:
+            view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return # Archivo vacío: no se puede mapear
+    with view:
+        if _MADVISE:
+            view.madvise(mmap.MADV_SEQUENTIAL)
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+        released = 0
+        for start in range(0, len(view), chunk_bytes):
+            text = decoder.decode(view[start:start + chunk_bytes])
+            if _MADVISE:
+                # Las páginas ya decodificadas se sueltan: siguen en la caché del sistema,
+                # pero no cuentan en la memoria del proceso
+                end = (start + chunk_bytes) // mmap.PAGESIZE * mmap.PAGESIZE
+                if end > released:
+                    view.madvise(mmap.MADV_DONTNEED, released, end - released)
+                    released = end
+            if text:
+                yield text
+        text = decoder.decode(b'', final=True)
+        if text:
+            yield text
+
+
+def read_preview(path, max_chars, encoding='utf-8'):
+    """
+    Lee solo el principio de un archivo de texto.
+    Args:
+        path (str): Ruta del archivo.
+        max_chars (int): Caracteres como máximo.
+        encoding (str): Codificación del archivo.
+    Returns:
+        tuple: (texto, completo). completo es False si el archivo tiene más de max_chars caracteres.
+    """
+    # Cuatro bytes por carácter como mucho en UTF-8: un solo trozo basta casi siempre
+    chunks = iter_text(path, min(CHUNK_BYTES, 4 * max_chars + 4), encoding)
+    pieces = []
+    length = 0
+    try:
+        for chunk in chunks:
+            pieces.append(chunk)
+            length += len(chunk)
+            if length > max_chars:
+                return ''.join(pieces)[:max_chars], False
+    finally:
+        chunks.close()
+    return ''.join(pieces), True
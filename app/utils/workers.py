@@ -0,0 +1,61 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Procesos de trabajo persistentes ("calientes"): cada proceso importa los módulos y
+prepara las tablas una sola vez al arrancar, y después atiende muchas conversiones.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.utils import braillebook
+
+
+def warm_up():
+    """
+    Inicializador de cada proceso: carga ReportLab, las tablas de traducción y las
+    formas de celda dibujando un documento mínimo en cada modo.
+    """
+    for stamp in (False, True):
+        braillebook.create_braille_pdf('Aa1.', stamp=stamp)
+
+
+def _ready():
+    # Tarea vacía que retiene su proceso un momento, para que cada una caiga en un proceso distinto
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def warm_pool(workers=None, wait=True):
+    """
+    Crea un grupo de procesos que ya están calientes o se calientan al arrancar.
+    Args:
+        workers (int or None): Número de procesos; None usa todos los núcleos.
+        wait (bool): Si es True, arranca todos los procesos y espera a que terminen
+            de calentarse antes de volver.
+    Returns:
+        ProcessPoolExecutor: El grupo de procesos.
+    """
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+    if wait:
+        for future in [executor.submit(_ready) for _ in range(workers)]:
+            future.result()
+    return executor
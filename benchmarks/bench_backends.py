@@ -0,0 +1,87 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Benchmark de los backends de PDF: el lienzo de ReportLab frente al escritor nativo.
+
+Traduce el texto una vez y dibuja el mismo flujo de celdas con cada backend, con y
+sin formas por patrón de celda (stamp) y en las dos orientaciones a la vez, midiendo
+páginas por segundo y bytes por página.
+
+Uso:
+    python -m benchmarks.bench_backends [--pages 100] [--repeat 3] [--workers 1]
+"""
+
+import argparse
+import time
+
+from app.utils.braillebook import PDF_BACKENDS, render_braille_pdfs, translate_text
+
+
+SAMPLE_PATH = 'test_dat/prueba.txt'
+
+
+def build_stream(pages):
+    """
+    Repite el texto de prueba hasta llenar el número de páginas pedido.
+    """
+    with open(SAMPLE_PATH, 'r', encoding='utf-8') as file:
+        sample = file.read()
+    copies = 1
+    while True:
+        stream = translate_text(sample * copies)
+        if stream.num_pages > pages:
+            return stream.page_slice(0, pages)
+        copies *= 2
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    stream = build_stream(args.pages)
+    print(f"{stream.num_pages:,} páginas, {len(stream.cells):,} celdas")
+    for stamp in (False, True):
+        for mirrors in ((False,), (True, False)):
+            results = {}
+            for backend in PDF_BACKENDS:
+                elapsed, buffers = best_time(
+                    lambda: render_braille_pdfs(stream, mirrors, stamp=stamp, workers=args.workers, backend=backend),
+                    args.repeat)
+                results[backend] = elapsed
+                bytes_per_page = sum(len(buffer.getvalue()) for buffer in buffers) / len(buffers) / stream.num_pages
+                print(f"stamp={stamp!s:<5} pdfs={len(mirrors)} {backend:>9}: {elapsed:8.3f} s "
+                      f"{stream.num_pages / elapsed:10.1f} pág/s {bytes_per_page:10,.0f} bytes/pág")
+            print(f"{'':>18}aceleración: {results['reportlab'] / results['native']:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Benchmark del braille contraído (Grado 2) frente al Grado 1.
+
+Mide, sobre un texto de muestra repetido hasta el tamaño pedido, las celdas y
+páginas de cada grado (el ahorro de papel) y la velocidad de traducción, además
+del tiempo de compilar la tabla y de cargarla desde la caché en disco.
+
+Uso:
+    python -m benchmarks.bench_contractions [--megabytes 1] [--repeat 3] [--table en-ueb-g2]
+"""
+
+import argparse
+import os
+import time
+
+from app.utils.braillebook import translate_text
+from app.utils.contractions import TABLES_DIR, available_tables, compile_rules, load_table, parse_rules
+
+
+SAMPLE_PATH = 'test_dat/sample_en.txt'
+
+
+def build_text(megabytes):
+    """
+    Repite el texto de muestra hasta alcanzar el tamaño pedido.
+    """
+    with open(SAMPLE_PATH, 'r', encoding='utf-8') as file:
+        sample = file.read()
+    size = int(megabytes * 1024 * 1024)
+    return (sample * (size // len(sample) + 1))[:size]
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--megabytes', type=float, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--table', choices=available_tables(), default='en-ueb-g2')
+    args = parser.parse_args()
+
+    with open(os.path.join(TABLES_DIR, args.table + '.txt'), 'r', encoding='utf-8') as file:
+        source = file.read()
+    compile_seconds, _ = best_time(lambda: compile_rules(parse_rules(source, args.table)), args.repeat)
+    start = time.perf_counter()
+    table = load_table(args.table)
+    load_seconds = time.perf_counter() - start
+    print(f"tabla {args.table}: compilar {compile_seconds * 1000:.2f} ms, cargar {load_seconds * 1000:.2f} ms")
+
+    text = build_text(args.megabytes)
+    print(f"{len(text):,} caracteres")
+    results = {}
+    for name, contractions in (('Grado 1', None), ('Grado 2', table)):
+        elapsed, stream = best_time(lambda: translate_text(text, contractions=contractions), args.repeat)
+        results[name] = stream
+        print(f"{name:>8}: {elapsed:8.3f} s  {len(text) / elapsed:14,.0f} caracteres/s"
+              f"  {len(stream.cells):12,} celdas  {stream.num_pages:8,} páginas")
+    grade1, grade2 = results['Grado 1'], results['Grado 2']
+    print(f"{'ahorro':>8}: {1 - len(grade2.cells) / len(grade1.cells):8.1%} celdas"
+          f"  {1 - grade2.num_pages / grade1.num_pages:8.1%} páginas")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Benchmark de arranque: tiempo hasta el primer PDF con una llamada en frío a la CLI
+frente a un proceso de trabajo caliente (app.utils.workers.warm_pool).
+
+Uso:
+    python -m benchmarks.bench_startup [--repeat 5] [--input test_dat/prueba.txt]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.utils.braillebook import write_braille_pdf
+from app.utils.workers import warm_pool
+
+
+IMPORT_SNIPPET = ("import time; start = time.perf_counter(); import app.utils.braillebook; "
+                  "print(time.perf_counter() - start)")
+
+
+def convert_file(input_path, output_path):
+    """
+    Tarea del proceso caliente: la misma conversión que "braillebook convert".
+    """
+    with open(input_path, 'r', encoding='utf-8') as source:
+        return write_braille_pdf(source, output_path, stamp=True)
+
+
+def cold_import(repeat):
+    return [float(subprocess.run([sys.executable, '-c', IMPORT_SNIPPET], check=True,
+                                 capture_output=True, text=True).stdout) for _ in range(repeat)]
+
+
+def cold_cli(input_path, output_path, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'app.utils.braillebook', 'convert', input_path, output_path],
+                       check=True, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def warm_worker(input_path, output_path, repeat):
+    times = []
+    with warm_pool(1) as executor:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            executor.submit(convert_file, input_path, output_path).result()
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--input', default='test_dat/prueba.txt')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, 'out.pdf')
+        results = {
+            'importar braillebook': cold_import(args.repeat),
+            'CLI en frío': cold_cli(args.input, output_path, args.repeat),
+            'proceso caliente': warm_worker(args.input, output_path, args.repeat),
+        }
+    for name, times in results.items():
+        print(f"{name:>20}: mediana {statistics.median(times) * 1000:9.1f} ms  mínimo {min(times) * 1000:9.1f} ms")
+    speedup = statistics.median(results['CLI en frío']) / statistics.median(results['proceso caliente'])
+    print(f"{'aceleración':>20}: {speedup:8.1f}x hasta el primer PDF")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Suite de benchmarks reproducible: traducción, PDF (normal y espejo) y vista previa
+sobre textos sintéticos de distintos tamaños y mezclas de caracteres.
+
+Cada caso se mide en un proceso nuevo, así que su pico de memoria (RSS máximo) no
+depende de los casos anteriores. Los resultados se escriben en JSON para poder
+comparar ejecuciones a lo largo del tiempo.
+
+Uso:
+    python -m benchmarks.bench_suite [--sizes 1K,10K,100K] [--mixes prose,upper] [--stamp]
+                                     [--backend native] [--preview-pages 3] [--output results.json]
+    python -m benchmarks.bench_suite --sizes 1K,10K,100K,1M,10M,50M --stamp --output full.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import reportlab
+
+
+SAMPLE_PATH = 'test_dat/prueba.txt'
+DEFAULT_SIZES = '1K,10K,100K'
+# Caracteres de cada mezcla; las que no son "prose" fuerzan los caminos de marcadores
+MIXES = {
+    'prose': None,
+    'upper': 'ABCDEFGHIJKLMNÑOPQRSTUVWXYZÁÉÍÓÚ abc',
+    'digits': '0123456789 0123456789 .,',
+    'accents': 'áéíóúüñÁÉÍÓÚÜÑ aeiou',
+    'punctuation': '.,;:!?¿¡()"\'-«»@#$%&*+/= abc',
+    'mixed': 'abcdefghijklmnñopqrstuvwxyzABCDEFGHIJKLMNÑOPQRSTUVWXYZáéíóúüñÁÉÍÓÚ0123456789.,;:!?¿¡()"- ',
+}
+_UNITS = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+
+def parse_size(size):
+    """'1K' -> 1024, '50M' -> 52428800."""
+    size = size.strip().upper()
+    if size[-1] in _UNITS:
+        return int(float(size[:-1]) * _UNITS[size[-1]])
+    return int(size)
+
+
+def build_text(mix, size, seed=0):
+    """
+    Texto sintético de `size` caracteres, siempre el mismo para una mezcla y semilla:
+    palabras de 1 a 12 caracteres y párrafos de 20 a 200 palabras.
+    """
+    if MIXES[mix] is None:
+        with open(SAMPLE_PATH, 'r', encoding='utf-8') as file:
+            sample = file.read()
+        return (sample * (size // len(sample) + 1))[:size]
+    rng = random.Random(seed)
+    alphabet = MIXES[mix].replace(' ', '')
+    # Un bloque aleatorio repetido basta para los tamaños grandes y se genera rápido
+    block_size = min(size, 1 << 20)
+    words = []
+    length = 0
+    while length < block_size:
+        word = ''.join(rng.choices(alphabet, k=rng.randint(1, 12)))
+        separator = '\n' if rng.random() < 1 / 100 else ' '
+        words.append(word + separator)
+        length += len(word) + 1
+    block = ''.join(words)
+    return (block * (size // len(block) + 1))[:size]
+
+
+def _run_case(mix, size, stamp, backend, preview_pages, results):
+    # Se importa aquí para que el coste de importar no cuente en el pico de memoria del padre
+    from app.utils import braillebook
+
+    text = build_text(mix, size)
+    record = {'mix': mix, 'chars': len(text), 'stamp': stamp, 'backend': backend}
+
+    start = time.perf_counter()
+    stream = braillebook.translate_text(text)
+    seconds = time.perf_counter() - start
+    record['pages'] = stream.num_pages
+    record['cells'] = len(stream.cells)
+    record['translate'] = {'seconds': seconds, 'chars_per_second': len(text) / seconds}
+
+    for name, mirror in (('pdf_normal', False), ('pdf_mirror', True)):
+        start = time.perf_counter()
+        pdf = braillebook.create_braille_pdf(text, mirror=mirror, stamp=stamp, backend=backend)
+        seconds = time.perf_counter() - start
+        size_bytes = len(pdf.getvalue())
+        record[name] = {'seconds': seconds,
+                        'chars_per_second': len(text) / seconds,
+                        'pages_per_second': stream.num_pages / seconds,
+                        'bytes': size_bytes,
+                        'bytes_per_page': size_bytes / stream.num_pages}
+    record['mirror_over_normal'] = record['pdf_mirror']['seconds'] / record['pdf_normal']['seconds']
+
+    pages = range(min(preview_pages, stream.num_pages))
+    start = time.perf_counter()
+    for page in pages:
+        braillebook.pdf_to_image(pdf, page)
+    record['pdf_to_image'] = {'seconds_per_page': (time.perf_counter() - start) / len(pages)}
+    start = time.perf_counter()
+    for page in pages:
+        braillebook.render_page_image(stream, page)
+    record['render_page_image'] = {'seconds_per_page': (time.perf_counter() - start) / len(pages)}
+
+    # ru_maxrss está en KiB en Linux y en bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    record['peak_rss_bytes'] = peak if sys.platform == 'darwin' else peak * 1024
+    results.put(record)
+
+
+def run_case(mix, size, stamp, backend, preview_pages):
+    """
+    Mide un caso en un proceso nuevo y devuelve su registro.
+    """
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_run_case, args=(mix, size, stamp, backend, preview_pages, results))
+    process.start()
+    record = results.get()
+    process.join()
+    return record
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'reportlab': reportlab.Version,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f"Tamaños en caracteres (por defecto, {DEFAULT_SIZES}).")
+    parser.add_argument('--mixes', default=','.join(MIXES), help='Mezclas de caracteres (por defecto, todas).')
+    parser.add_argument('--stamp', action='store_true', help='Dibuja con una forma por patrón de celda.')
+    parser.add_argument('--backend', choices=('reportlab', 'native'), default='reportlab',
+                        help='Backend de PDF (por defecto, reportlab).')
+    parser.add_argument('--preview-pages', type=int, default=3, help='Páginas por caso al medir la vista previa.')
+    parser.add_argument('--output', default='-', help='Archivo JSON de resultados (por defecto, la salida estándar).')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes.split(','):
+        for mix in args.mixes.split(','):
+            record = run_case(mix, parse_size(size), args.stamp, args.backend, args.preview_pages)
+            results.append(record)
+            print(f"{mix:>12} {record['chars']:>10,} caracteres {record['pages']:>7,} páginas  "
+                  f"PDF {record['pdf_normal']['pages_per_second']:8.1f} pág/s  "
+                  f"espejo x{record['mirror_over_normal']:.2f}  "
+                  f"pico {record['peak_rss_bytes'] / 2**20:7.1f} MiB", file=sys.stderr)
+
+    report = json.dumps({'meta': metadata(), 'results': results}, indent=1)
+    if args.output == '-':
+        print(report)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(report + '\n')
+
+
+if __name__ == '__main__':
+    main()
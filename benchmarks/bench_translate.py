@@ -0,0 +1,127 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Microbenchmark de la traducción de texto a celdas braille.
+
+Compara translate_text (tabla precalculada + str.translate) con el recorrido
+carácter a carácter que se usaba antes, sobre una "novela" de varios MB.
+
+Uso:
+    python -m benchmarks.bench_translate [--megabytes 4] [--repeat 3]
+"""
+
+import argparse
+import time
+from array import array
+
+from app.utils.braillebook import (
+    MAX_CELLS_PER_LINE, MAX_LINES_PER_PAGE, CellStream, _char_to_cells, translate_text
+)
+
+
+SAMPLE_PATH = 'test_dat/prueba.txt'
+
+
+def translate_text_per_char(text):
+    """
+    Traducción de referencia: un diccionario por carácter y un cursor de línea en Python.
+    """
+    cells = array('B')
+    line_offsets = array('I', [0])
+    page_offsets = array('I', [0])
+    num_cells_in_line = 0
+
+    def move_to_next_line():
+        nonlocal num_cells_in_line
+        line_offsets.append(len(cells))
+        num_cells_in_line = 0
+        if (len(line_offsets) - 1) % MAX_LINES_PER_PAGE == 0:
+            page_offsets.append(len(line_offsets) - 1)
+
+    for char in text:
+        if char == '\n':
+            move_to_next_line()
+            continue
+        if num_cells_in_line >= MAX_CELLS_PER_LINE:
+            move_to_next_line()
+        marker, cell = _char_to_cells(char)
+        if marker is not None:
+            cells.append(marker)
+            num_cells_in_line += 1
+            if num_cells_in_line >= MAX_CELLS_PER_LINE:
+                move_to_next_line()
+        if cell is not None:
+            cells.append(cell)
+            num_cells_in_line += 1
+
+    if len(page_offsets) > 1:
+        last_page_cells = line_offsets[page_offsets[-1]]
+        if not any(cells[last_page_cells:]):
+            del line_offsets[page_offsets[-1]:]
+            del cells[last_page_cells:]
+            page_offsets.pop()
+
+    return CellStream(cells, line_offsets, page_offsets)
+
+
+def build_novel(megabytes):
+    """
+    Repite el texto de prueba, con párrafos largos, hasta alcanzar el tamaño pedido.
+    """
+    with open(SAMPLE_PATH, 'r', encoding='utf-8') as file:
+        sample = file.read()
+    paragraph = (sample.replace('\n', ' ') + ' ') * 8 + 'Capítulo 12: ¿Qué pasó el 3 de mayo?\n'
+    size = int(megabytes * 1024 * 1024)
+    return (paragraph * (size // len(paragraph) + 1))[:size]
+
+
+def best_time(function, text, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--megabytes', type=float, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    text = build_novel(args.megabytes)
+    before = translate_text_per_char(text)
+    after = translate_text(text)
+    assert (before.cells, before.line_offsets, before.page_offsets) == \
+        (after.cells, after.line_offsets, after.page_offsets), "Las traducciones no coinciden"
+
+    print(f"{len(text):,} caracteres, {after.num_pages:,} páginas")
+    results = {}
+    for name, function in (('carácter a carácter', translate_text_per_char),
+                           ('tabla precalculada', translate_text)):
+        elapsed = best_time(function, text, args.repeat)
+        results[name] = len(text) / elapsed
+        print(f"{name:>20}: {elapsed:8.3f} s  {results[name]:14,.0f} caracteres/s")
+    print(f"{'aceleración':>20}: {results['tabla precalculada'] / results['carácter a carácter']:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
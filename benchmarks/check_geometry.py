@@ -0,0 +1,596 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+
+"""
+Arnés de regresión de la geometría de los puntos.
+
+Genera textos aleatorios reproducibles (una semilla por caso) que fuerzan los casos
+delicados de la paginación: líneas que se llenan justo, marcadores de mayúscula o
+número en la última columna, caracteres sin celda, saltos de línea seguidos y
+saltos de página. Los puntos esperados los da el motor de referencia, una copia
+congelada del cursor carácter a carácter del motor original, independiente del código
+que se optimiza; cada texto se convierte también con cada motor optimizado, de cada
+PDF se extrae con PyMuPDF el centro y el radio de todos los puntos de cada página,
+en coordenadas de la hoja sin espejo, y se comparan con una tolerancia en puntos PDF.
+
+Si un caso falla, el texto se reduce mientras siga fallando y se muestra el mínimo.
+Con --save se guardan los puntos de referencia en un archivo .npz; con --golden se
+compara contra ese archivo, incluido el propio motor de referencia, que así tampoco
+puede cambiar sin que se note. tests/test_geometry.py ejecuta una versión reducida.
+
+Uso:
+    python -m benchmarks.check_geometry [--cases 40] [--seed 0] [--tolerance 0.01]
+                                        [--engines native,native-stamp] [--save golden.npz]
+    python -m benchmarks.check_geometry --golden golden.npz
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import random
+import sys
+import time
+
+import fitz # PyMuPDF
+import numpy as np
+
+from app.utils import braillebook
+from app.utils.braillebook import (A4_PROFILE, POINT_RADIUS, US_LETTER_PROFILE, IncrementalDocument, PageIndex,
+                                   create_braille_pdf_pages, layout_dots, render_braille_pdf, translate_text,
+                                   write_braille_pdfs)
+from app.utils.contractions import load_table
+
+
+GOLDEN_VERSION = 1
+DEFAULT_TOLERANCE = 0.01
+
+# Hojas de los casos: las dos de serie y las mismas en interpunto, una con desplazamiento propio
+PROFILES = (US_LETTER_PROFILE, A4_PROFILE, US_LETTER_PROFILE.with_interpoint(),
+            A4_PROFILE.with_interpoint((3.0, 7.2)))
+
+LOWER = 'abcdefghijklmnopqrstuvwxyz'
+# Caracteres que añaden un marcador (mayúscula o número) o que no tienen celda
+MARKED = 'ABCDEÑÁÉ0123456789'
+UNMAPPED = '中Σ\t\u200b'
+PROSE = LOWER * 3 + 'áéíóúñü' + MARKED + '.,;:!?¿¡()"-' + '     '
+WORDS = ('the and of with for ch sh th ing ound ever time knowledge were be in '
+         'child people this which out still father mother character').split()
+
+
+class Case:
+    """
+    Un caso del arnés: texto y opciones de conversión.
+    """
+
+    __slots__ = ('number', 'text', 'profile', 'contractions', 'mirror', 'stamp', 'seed')
+
+    def __init__(self, number, text, profile, contractions, mirror, stamp, seed):
+        self.number = number
+        self.text = text
+        self.profile = profile
+        self.contractions = contractions
+        self.mirror = mirror
+        self.stamp = stamp
+        self.seed = seed
+
+    def with_text(self, text):
+        return Case(self.number, text, self.profile, self.contractions, self.mirror, self.stamp, self.seed)
+
+    def describe(self):
+        table = self.contractions.name if self.contractions is not None else 'grado 1'
+        return (f"caso {self.number}: {self.profile!r}, {table}, mirror={self.mirror}, stamp={self.stamp}, "
+                f"{len(self.text)} caracteres")
+
+
+# --- Generación de textos ---
+
+def _piece(rng, profile, english):
+    """
+    Un fragmento de texto de uno de los tipos que fuerzan un caso límite.
+    """
+    width = profile.cells_per_line
+    kind = rng.choice(('wrap', 'marker', 'newlines', 'page', 'unmapped', 'prose', 'prose'))
+    if kind == 'wrap':
+        # Párrafos que ocupan justo una o varias líneas, o una celda más o menos
+        length = rng.choice((width - 1, width, width + 1, 2 * width, 2 * width + 1))
+        return ''.join(rng.choice(LOWER) for _ in range(length)) + rng.choice(('\n', ' ', ''))
+    if kind == 'marker':
+        # Un marcador en la última columna: la letra que lo sigue pasa a la línea siguiente
+        before = rng.choice((width - 1, width - 2, 2 * width - 1))
+        return 'a' * before + rng.choice(MARKED) + rng.choice(MARKED + 'x') + rng.choice(('\n', '', ' '))
+    if kind == 'newlines':
+        return '\n' * rng.choice((1, 2, 3, profile.lines_per_page - 1, profile.lines_per_page))
+    if kind == 'page':
+        # Párrafos cortos hasta llenar una página, justo o con una línea de más o de menos
+        lines = profile.lines_per_page + rng.choice((-1, 0, 1))
+        return ''.join('x' * rng.randint(0, width) + '\n' for _ in range(lines))
+    if kind == 'unmapped':
+        # Caracteres sin celda, también al final de una línea llena
+        return 'b' * rng.choice((width, width - 1, 3)) + ''.join(rng.choice(UNMAPPED) for _ in range(rng.randint(1, 4)))
+    if english:
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 40))) + rng.choice(('\n', ' ', '. '))
+    return ''.join(rng.choice(PROSE) for _ in range(rng.randint(1, 200)))
+
+
+def generate_case(number, seed, max_pieces=12):
+    """
+    Genera el caso número `number` de una semilla; siempre el mismo para los mismos argumentos.
+    """
+    case_seed = seed * 1_000_003 + number
+    rng = random.Random(case_seed)
+    profile = rng.choice(PROFILES)
+    contractions = load_table('en-ueb-g2') if rng.random() < 0.25 else None
+    text = ''.join(_piece(rng, profile, contractions is not None) for _ in range(rng.randint(1, max_pieces)))
+    return Case(number, text, profile, contractions, rng.random() < 0.5, rng.random() < 0.5, case_seed)
+
+
+# --- Extracción y comparación de puntos ---
+
+def extract_dots(data, mirror=False):
+    """
+    Centro y radio de cada punto de cada página de un PDF.
+    Args:
+        data (bytes): El PDF.
+        mirror (bool): Si el PDF está en modo espejo; los puntos se devuelven sin espejo.
+    Returns:
+        list of ndarray: Por página, una fila (x, y, radio) por punto, con el origen
+            arriba a la izquierda, ordenadas por fila y columna.
+    """
+    pages = []
+    with fitz.open(stream=data, filetype='pdf') as document:
+        for page in document:
+            starts = []
+            for path in page.get_drawings():
+                items = path['items']
+                # Cada punto es un círculo de cuatro curvas de Bézier
+                if len(items) % 4 or any(item[0] != 'c' for item in items):
+                    raise ValueError('La página %d tiene trazados que no son puntos.' % page.number)
+                starts.extend((item[1].x, item[1].y) for item in items)
+            circles = np.array(starts, dtype=float).reshape(-1, 4, 2)
+            low, high = circles.min(axis=1), circles.max(axis=1)
+            centers = (low + high) / 2
+            if mirror:
+                centers[:, 0] = page.rect.width - centers[:, 0]
+            pages.append(_sorted_dots(np.column_stack([centers, (high - low).mean(axis=1) / 2])))
+    return pages
+
+
+def _sorted_dots(dots):
+    # Los puntos distan entre sí mucho más que la tolerancia, así que redondear la clave
+    # da el mismo orden en todos los motores
+    keys = np.round(dots[:, :2], 1)
+    return dots[np.lexsort((keys[:, 0], keys[:, 1]))]
+
+
+def compare_dots(reference, candidate, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compara los puntos de dos documentos.
+    Returns:
+        tuple: (mensaje de la primera diferencia o None, desviación máxima encontrada).
+    """
+    if len(reference) != len(candidate):
+        return '%d páginas en lugar de %d' % (len(candidate), len(reference)), 0.0
+    worst = 0.0
+    for page, (expected, actual) in enumerate(zip(reference, candidate)):
+        if len(expected) != len(actual):
+            return 'página %d: %d puntos en lugar de %d' % (page, len(actual), len(expected)), worst
+        if not len(expected):
+            continue
+        deviation = np.abs(expected - actual).max(axis=1)
+        worst = max(worst, float(deviation.max()))
+        if worst > tolerance:
+            dot = int(deviation.argmax())
+            return ('página %d, punto %d: %s en lugar de %s' % (page, dot, np.round(actual[dot], 4).tolist(),
+                                                               np.round(expected[dot], 4).tolist())), worst
+    return None, worst
+
+
+# --- Motores ---
+
+def _stream(case):
+    return translate_text(case.text, case.profile, case.contractions)
+
+
+# --- Motor de referencia ---
+#
+# Copia congelada del motor original (el create_braille_pdf de la primera versión del
+# proyecto): recorre el texto carácter a carácter con un cursor, salta de línea y de
+# página sobre la marcha y coloca cada punto. No usa el traductor, el paginador ni la
+# maquetación de app.utils.braillebook, así que una regresión en ese código compartido
+# no puede pasar inadvertida porque todos los motores la repitan. No hay que cambiarlo
+# al optimizar; solo cuando cambie a propósito el resultado (ver KNOWN_DIFFERENCES).
+#
+# Lo único que se generaliza respecto al original es la hoja (márgenes, pasos y ajustes
+# de cada PageProfile, y el verso en interpunto) y el Grado 2, cuyas fichas se leen de
+# app.utils.contractions con las mismas reglas de cursor que un carácter de Grado 1.
+
+_BASELINE_DOT_RADIUS = (0.057 / 2) * 72
+_BASELINE_DOT_SPACING = 0.09 * 72
+_BASELINE_UPPERCASE = '010001'
+_BASELINE_NUMBER = '010111'
+_BASELINE_ALPHABET = {
+    'a': '100000', 'b': '101000', 'c': '110000', 'd': '110100', 'e': '100100',
+    'f': '111000', 'g': '111100', 'h': '101100', 'i': '011000', 'j': '011100',
+    'k': '100010', 'l': '101010', 'm': '110010', 'n': '110110', 'o': '100110',
+    'p': '111010', 'q': '111110', 'r': '101110', 's': '011010', 't': '011110',
+    'u': '100011', 'v': '101011', 'w': '011101', 'x': '110011', 'y': '110111',
+    'z': '100111', ' ': '000000',
+    'á': '101111', 'é': '011011', 'í': '010010', 'ó': '010011', 'ú': '011111',
+    'ñ': '110101'
+}
+_BASELINE_NUMBERS = {
+    '0': '011100', '1': '100000', '2': '101000', '3': '110000', '4': '110100',
+    '5': '100100', '6': '111000', '7': '111100', '8': '101100', '9': '011000'
+}
+_BASELINE_PUNCTUATION = {
+    ',': '001000', '.': '000010', ';': '001010', ':': '001100',
+    '¿': '001001', '?': '001001', '¡': '001110', '!': '001110',
+    '“': '001011', '”': '001011', '(': '101001', ')': '010110',
+    '-': '000011',
+}
+# Bit del código de 6 bits de una ficha para cada posición de la cadena binaria (puntos 1, 4, 2, 5, 3, 6)
+_TOKEN_BITS = (0, 3, 1, 4, 2, 5)
+
+# Diferencias con el motor original que se aceptaron a propósito. Cada una se aplica
+# aquí, a la vista, y tiene su propia prueba en tests/test_geometry.py:
+#   'empty-document': un texto sin ningún punto (vacío, solo saltos de línea o solo
+#       caracteres sin celda que no llegan a llenar una página) daba un PDF de 0 páginas
+#       porque ReportLab descarta la última página si está vacía; ahora tiene una página
+#       en blanco, que es lo que la vista previa y los índices de páginas esperan.
+#   'mirror-every-page': el original solo aplicaba el espejo a la primera página (el
+#       estado gráfico se reinicia con cada showPage); ahora se aplica a todas. La
+#       referencia da los puntos sin espejo y extract_dots deshace el de cada página.
+KNOWN_DIFFERENCES = ('empty-document', 'mirror-every-page')
+
+
+def _baseline_events(text):
+    """
+    Un evento por carácter, como en el bucle original: None para un salto de línea, o
+    (marcadores, celda) con las cadenas binarias de sus celdas; la celda puede ser None.
+    """
+    for char in text:
+        if char == '\n':
+            yield None
+            continue
+        binary = None
+        markers = ()
+        if char.isupper():
+            markers = (_BASELINE_UPPERCASE,)
+            binary = _BASELINE_ALPHABET.get(char.lower())
+        elif char.isdigit():
+            markers = (_BASELINE_NUMBER,)
+            binary = _BASELINE_NUMBERS.get(char)
+        elif char in _BASELINE_PUNCTUATION:
+            binary = _BASELINE_PUNCTUATION[char]
+        elif char.lower() in _BASELINE_ALPHABET:
+            binary = _BASELINE_ALPHABET[char.lower()]
+        yield markers, binary
+
+
+def _token_events(tokens):
+    """
+    Los mismos eventos a partir de las fichas de Grado 2: los marcadores (0x40 | celda)
+    preceden a la ficha de su carácter, que es una celda, 0x80 (sin celda) o 0x81 (salto).
+    """
+    def binary(code):
+        return ''.join('1' if code >> bit & 1 else '0' for bit in _TOKEN_BITS)
+
+    markers = []
+    for token in tokens:
+        if 0x40 <= token < 0x80:
+            markers.append(binary(token & 0x3F))
+        elif token == 0x81:
+            yield None
+        else:
+            yield tuple(markers), (binary(token) if token < 0x40 else None)
+            markers = []
+
+
+def _baseline_page_geometry(profile, page):
+    # (izquierda, arriba) del bloque de texto de una página; el verso cambia los márgenes de lado
+    left, top, right, _ = profile.margins
+    if profile.verso_offset is not None and page % 2 == 1:
+        dx, dy = profile.verso_offset
+        return right + dx, top + dy
+    return left, top
+
+
+def reference_engine(case):
+    """
+    El motor de referencia: copia congelada del cursor carácter a carácter del motor original.
+    Returns:
+        list of ndarray: Puntos de cada página, como los de extract_dots.
+    """
+    profile = case.profile
+    left, top, right, bottom = profile.margins
+    max_cells = max(1, int((profile.width - left - right) / profile.cell_advance_width))
+    max_lines = max(1, int((profile.height - top - bottom) / profile.cell_advance_height))
+    adjustments = list(profile.line_adjustments)
+    radius = _BASELINE_DOT_RADIUS
+    if case.contractions is None:
+        events = _baseline_events(case.text)
+    else:
+        events = _token_events(case.contractions.translate(case.text))
+
+    pages = []
+    dots = []
+    page_left, page_top = _baseline_page_geometry(profile, 0)
+    x = page_left
+    y = page_top # Desde arriba, en lugar de la Y de ReportLab, que crece hacia arriba
+    lines = 0
+    cells = 0
+
+    def next_line():
+        nonlocal x, y, lines, cells, dots, page_left, page_top
+        x = page_left
+        lines += 1
+        adjustment = adjustments[lines] if lines < len(adjustments) else 0.0
+        y += profile.cell_advance_height + adjustment
+        cells = 0
+        if lines >= max_lines:
+            pages.append(dots)
+            dots = []
+            page_left, page_top = _baseline_page_geometry(profile, len(pages))
+            x = page_left
+            y = page_top
+            lines = 0
+
+    def draw(binary):
+        nonlocal x, cells
+        for position, bit in enumerate(binary):
+            if bit == '1':
+                dots.append((x + radius + (position % 2) * _BASELINE_DOT_SPACING,
+                             y + radius + (position // 2) * _BASELINE_DOT_SPACING, radius))
+        x += profile.cell_advance_width
+        cells += 1
+
+    for event in events:
+        if event is None:
+            next_line()
+            continue
+        markers, binary = event
+        if cells >= max_cells:
+            next_line()
+        for marker in markers:
+            draw(marker)
+            if cells >= max_cells:
+                next_line()
+        if binary:
+            draw(binary)
+    # ReportLab descarta la última página si no se dibujó nada en ella
+    if dots:
+        pages.append(dots)
+    if not pages:
+        pages.append([]) # 'empty-document'
+    return [_sorted_dots(np.array(page, dtype=float).reshape(-1, 3)) for page in pages]
+
+
+def _layout_engine(case):
+    # La maquetación vectorizada, sin pasar por ningún PDF
+    stream = _stream(case)
+    dots = layout_dots(stream)
+    x = dots.x
+    y = case.profile.height - dots.y
+    return [_sorted_dots(np.column_stack([x[start:end], y[start:end], np.full(end - start, POINT_RADIUS)]))
+            for start, end in zip(dots.page_starts[:-1], dots.page_starts[1:])]
+
+
+def _workers_engine(backend):
+    def engine(case):
+        # Con tareas de una página, los casos cortos también se reparten entre procesos
+        saved = braillebook.MIN_PAGES_PER_WORKER_TASK
+        braillebook.MIN_PAGES_PER_WORKER_TASK = 1
+        try:
+            return render_braille_pdf(_stream(case), case.mirror, case.stamp, workers=2, backend=backend).getvalue()
+        finally:
+            braillebook.MIN_PAGES_PER_WORKER_TASK = saved
+    return engine
+
+
+def _stream_engine(case):
+    # Escritura por trozos pequeños, que cortan párrafos y páginas en cualquier punto
+    output = io.BytesIO()
+    chunks = [case.text[start:start + 257] for start in range(0, len(case.text), 257)]
+    write_braille_pdfs(chunks, [output], (case.mirror,), case.stamp, case.profile, case.contractions)
+    return output.getvalue()
+
+
+def _pages_engine(case):
+    # El documento por rangos de páginas al azar, cada uno traducido desde el índice
+    stream = _stream(case)
+    index = PageIndex.from_stream(stream, len(case.text))
+    rng = random.Random(case.seed)
+    bounds = sorted(set(rng.sample(range(1, stream.num_pages), min(3, stream.num_pages - 1))) | {0, stream.num_pages})
+    pages = []
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        data = create_braille_pdf_pages(case.text, index, first, last, case.mirror, case.stamp, case.profile,
+                                        case.contractions, backend=rng.choice(braillebook.PDF_BACKENDS)).getvalue()
+        pages.extend(extract_dots(data, case.mirror))
+    return pages
+
+
+def _incremental_engine(case):
+    # Un documento editado hasta llegar al texto del caso
+    rng = random.Random(case.seed)
+    cut = rng.randint(0, len(case.text))
+    document = IncrementalDocument(case.text[:cut] + 'Ab1\n' * rng.randint(0, 40) + case.text[cut:], case.stamp,
+                                   case.profile, case.contractions)
+    document.to_pdf(case.mirror)
+    document.update(case.text)
+    return document.to_pdf(case.mirror).getvalue()
+
+
+def _backend_engine(backend, stamp):
+    def engine(case):
+        return render_braille_pdf(_stream(case), case.mirror, stamp, backend=backend).getvalue()
+    return engine
+
+
+# Cada motor devuelve los bytes de un PDF, o directamente los puntos de cada página
+ENGINES = {
+    'layout': _layout_engine,
+    'reportlab': _backend_engine('reportlab', False),
+    'reportlab-stamp': _backend_engine('reportlab', True),
+    'native': _backend_engine('native', False),
+    'native-stamp': _backend_engine('native', True),
+    'workers': _workers_engine('reportlab'),
+    'native-workers': _workers_engine('native'),
+    'stream': _stream_engine,
+    'pages': _pages_engine,
+    'incremental': _incremental_engine,
+}
+
+
+def run_engine(engine, case):
+    result = engine(case)
+    return extract_dots(result, case.mirror) if isinstance(result, bytes) else result
+
+
+def check_case(engine, case, reference, tolerance):
+    """
+    Returns:
+        tuple: (mensaje de la primera diferencia o None, desviación máxima).
+    """
+    try:
+        return compare_dots(reference, run_engine(engine, case), tolerance)
+    except Exception as error:
+        return f"{type(error).__name__}: {error}", 0.0
+
+
+def shrink(engine, case, tolerance, max_attempts=400):
+    """
+    Quita trozos del texto de un caso que falla mientras siga fallando.
+    Returns:
+        Case: El caso más pequeño encontrado.
+    """
+    def fails(candidate):
+        reference = reference_engine(candidate)
+        return check_case(engine, candidate, reference, tolerance)[0] is not None
+
+    attempts = 0
+    size = max(1, len(case.text) // 2)
+    while size and attempts < max_attempts:
+        start = 0
+        while start < len(case.text) and attempts < max_attempts:
+            candidate = case.with_text(case.text[:start] + case.text[start + size:])
+            attempts += 1
+            if fails(candidate):
+                case = candidate
+            else:
+                start += size
+        size //= 2
+    return case
+
+
+# --- Archivos de referencia ---
+
+def _cases_digest(cases):
+    # Si cambia el generador, los casos de una semilla ya no son los del archivo guardado
+    digest = hashlib.sha256()
+    for case in cases:
+        digest.update(case.describe().encode('utf-8'))
+        digest.update(case.text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def save_golden(path, seed, cases, references):
+    meta = {'version': GOLDEN_VERSION, 'seed': seed, 'cases': len(cases), 'digest': _cases_digest(cases)}
+    arrays = {'meta': np.array(json.dumps(meta))}
+    for number, pages in enumerate(references):
+        arrays['case%d' % number] = np.concatenate(
+            [np.column_stack([np.full(len(dots), page), dots]) for page, dots in enumerate(pages)])
+        arrays['pages%d' % number] = np.array(len(pages))
+    np.savez_compressed(path, **arrays)
+
+
+def load_golden(path):
+    """
+    Returns:
+        tuple: (semilla, casos, puntos de referencia de cada caso)
+    """
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        if meta['version'] != GOLDEN_VERSION:
+            raise ValueError('Versión de archivo de referencia no soportada: %d' % meta['version'])
+        cases = [generate_case(number, meta['seed']) for number in range(meta['cases'])]
+        if _cases_digest(cases) != meta['digest']:
+            raise ValueError('Los casos generados ya no coinciden con los de %s; vuelve a guardarlo con --save.' % path)
+        references = []
+        for number in range(meta['cases']):
+            rows = data['case%d' % number]
+            references.append([rows[rows[:, 0] == page, 1:] for page in range(int(data['pages%d' % number]))])
+    return meta['seed'], cases, references
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='En puntos PDF.')
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help='Motores a comprobar, separados por comas (por defecto, todos).')
+    parser.add_argument('--golden', help='Compara con los puntos guardados en lugar de con el motor de referencia.')
+    parser.add_argument('--save', help='Guarda los puntos del motor de referencia en este archivo .npz.')
+    parser.add_argument('--no-shrink', dest='shrink', action='store_false', help='No reduce los casos que fallan.')
+    args = parser.parse_args()
+    engines = [name for name in args.engines.split(',') if name]
+    unknown = set(engines) - set(ENGINES)
+    if unknown:
+        parser.error('motores desconocidos: %s' % ', '.join(sorted(unknown)))
+
+    start = time.perf_counter()
+    if args.golden:
+        seed, cases, references = load_golden(args.golden)
+        # El propio motor de referencia también se compara con lo guardado
+        engines = ['reference'] + engines
+    else:
+        seed = args.seed
+        cases = [generate_case(number, seed) for number in range(args.cases)]
+        references = [reference_engine(case) for case in cases]
+    print(f"{len(cases)} casos (semilla {seed}), {sum(map(len, references))} páginas, "
+          f"{sum(len(dots) for pages in references for dots in pages):,} puntos de referencia "
+          f"en {time.perf_counter() - start:.1f} s")
+    if args.save:
+        save_golden(args.save, seed, cases, references)
+
+    failures = 0
+    for name in engines:
+        engine = reference_engine if name == 'reference' else ENGINES[name]
+        start = time.perf_counter()
+        worst = 0.0
+        failed = []
+        for case, reference in zip(cases, references):
+            message, deviation = check_case(engine, case, reference, args.tolerance)
+            worst = max(worst, deviation)
+            if message is not None:
+                failed.append((case, message))
+        print(f"{name:>16}: {len(failed):3d} fallos  desviación máxima {worst:.2e}  "
+              f"{time.perf_counter() - start:6.1f} s")
+        for case, message in failed[:3]:
+            print(f"{'':>18}{case.describe()}: {message}")
+        if failed and args.shrink and name != 'reference':
+            case = shrink(engine, failed[0][0], args.tolerance)
+            print(f"{'':>18}caso mínimo: {case.text!r}")
+        failures += len(failed)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,11 +16,36 @@
 
 
 
+import os
+
 import streamlit as st
 
 
-from app.utils.braillebook import pdf_to_image, create_braille_pdf
+from app.utils.batch import convert_file
+from app.utils.braillebook import IncrementalDocument
+from app.utils.brailletext import format_braille_text
+from app.utils.cache import cached_document_pdf
+from app.utils.contractions import available_tables, load_table
+from app.utils.workers import warm_pool
 from interface.assets.utils import files
+from interface.assets.utils.bulk import BulkConversion
+
+
+# Resolution of the page preview, drawn directly from the braille cells
+PREVIEW_DPI = 72
+# Pages shown in the thumbnail strip and their resolution
+THUMBNAIL_COUNT = 5
+THUMBNAIL_DPI = 18
+# Download formats: label -> (braille text format, or None for the PDF; file name; MIME type)
+DOWNLOAD_FORMATS = {
+    "PDF": (None, "braille_text.pdf", "application/pdf"),
+    "BRF": ('brf', "braille_text.brf", "text/plain"),
+    "Unicode braille": ('unicode', "braille_text.txt", "text/plain; charset=utf-8"),
+}
+# Braille grades: label -> contraction table name, or None for uncontracted (Grade 1)
+GRADES = {"Grade 1": None, **{f"Grade 2 ({name})": name for name in available_tables()}}
+# Seconds between progress updates of a bulk conversion
+BULK_REFRESH_SECONDS = 0.5
 
 
 # Initialize session state for text if not already set
@@ -28,6 +53,120 @@ if 'text' not in st.session_state:
     st.session_state.text = ""
 
 
+def braille_document(text, table_name=None):
+    # One incremental document per session: an edit only re-lays out the pages it touches.
+    # Changing the grade changes every page, so the document is rebuilt from scratch.
+    document = st.session_state.get('braille_document')
+    contractions = load_table(table_name) if table_name else None
+    if document is None or document.contractions is not contractions:
+        document = st.session_state.braille_document = IncrementalDocument(stamp=True, contractions=contractions)
+    document.update(text)
+    return document
+
+
+def conversion_wait(future):
+    # Polls a background conversion and reruns the whole script once it is done
+    if future.done():
+        st.rerun()
+    st.caption("Converting the whole file...")
+
+
+def file_download(file_path, braille_format, table_name=None):
+    # Whole-file conversion for files longer than the preview: a worker process streams the text
+    # from the memory-mapped file and writes the result to disk once per file, format and grade.
+    # Returns the bytes of the output, or None while it is being converted.
+    name, _ = os.path.splitext(os.path.basename(file_path))
+    output_path = os.path.join(files.session_dir('outputs'), f"{name}.{table_name or 'grade1'}.{braille_format or 'pdf'}")
+    conversions = st.session_state.setdefault('file_conversions', {})
+    future = conversions.get(output_path)
+    if future is None and (not os.path.exists(output_path) or os.path.getmtime(output_path) < os.path.getmtime(file_path)):
+        # Written under another name first, so a partial output is never offered for download
+        future = conversions[output_path] = conversion_pool().submit(
+            convert_file, file_path, output_path + '.part', braille_format or 'pdf', stamp=True,
+            contractions=table_name)
+    if future is not None:
+        if not future.done():
+            st.fragment(run_every=BULK_REFRESH_SECONDS)(conversion_wait)(future)
+            return None
+        del conversions[output_path]
+        try:
+            record = future.result()
+        except Exception as error:
+            record = {'status': 'error', 'error': f"{type(error).__name__}: {error}"}
+        if record['status'] != 'converted':
+            if os.path.exists(output_path + '.part'):
+                os.remove(output_path + '.part')
+            st.error(f"{name}: {record['error']}")
+            return None
+        os.replace(output_path + '.part', output_path)
+    with open(output_path, 'rb') as file:
+        return file.read()
+
+
+@st.cache_resource
+def conversion_pool():
+    # One pool of warm worker processes shared by every session of the server
+    return warm_pool(wait=False)
+
+
+def bulk_progress(job, polling):
+    st.progress(job.progress, text=f"Converted {job.done} of {job.total} files")
+    if not job.finished:
+        return
+    if polling:
+        # Full rerun, so the fragment stops polling
+        st.rerun()
+    for error in job.errors:
+        st.error(error)
+    if os.path.exists(job.zip_path):
+        with open(job.zip_path, 'rb') as file:
+            data = file.read()
+        st.download_button("Download ZIP", data=data, file_name="braille.zip", mime="application/zip")
+
+
+def bulk_conversion(path_files):
+    # Converts every uploaded file in the background with the current format and grade
+    download_format = st.session_state.get('download_format', "PDF")
+    braille_format, file_name, _ = DOWNLOAD_FORMATS[download_format]
+    table_name = GRADES.get(st.session_state.get('braille_grade'))
+    job = st.session_state.get('bulk_conversion')
+    running = job is not None and not job.finished
+    if st.button(f"Convert all ({len(path_files['files'])}) to {download_format}", disabled=running,
+                 use_container_width=True):
+        input_paths = [os.path.join(path_files['temp_dir'], name) for name in path_files['files']]
+        job = st.session_state.bulk_conversion = BulkConversion(
+            conversion_pool(), input_paths, files.session_dir('bulk'), braille_format or 'pdf',
+            os.path.splitext(file_name)[1][1:], table_name)
+        running = True
+    if job is not None:
+        # Only the progress fragment reruns while converting; the rest of the page stays responsive
+        st.fragment(run_every=BULK_REFRESH_SECONDS if running else None)(bulk_progress)(job, running)
+
+
+def select_page(page):
+    st.session_state.preview_page = page
+
+
+def preview(document):
+    # Only the selected page and the visible thumbnails are drawn; the document memoizes them
+    page_count = document.num_pages
+    if st.session_state.get('preview_page', 1) > page_count:
+        st.session_state.preview_page = page_count
+    page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1, key='preview_page') - 1
+    st.image(document.page_image(page, dpi=PREVIEW_DPI),
+             caption=f"Preview of the Braille PDF, page {page + 1} of {page_count}",
+             use_container_width=True)
+
+    # Thumbnail strip: a window of pages around the selected one
+    first = max(0, min(page - THUMBNAIL_COUNT // 2, page_count - THUMBNAIL_COUNT))
+    columns = st.columns(THUMBNAIL_COUNT)
+    for column, thumbnail in zip(columns, range(first, min(first + THUMBNAIL_COUNT, page_count))):
+        with column:
+            st.image(document.page_image(thumbnail, dpi=THUMBNAIL_DPI), use_container_width=True)
+            st.button(str(thumbnail + 1), key=f'thumbnail_{thumbnail}', on_click=select_page,
+                      args=(thumbnail + 1,), disabled=thumbnail == page, use_container_width=True)
+
+
 def header():
     with st.container():
         st.title("BRAILLEBOOK")
@@ -38,11 +177,19 @@ def body():
     # Load the text file from sidebar
     with st.sidebar:
         path_txt = files.load_txt()
+        if path_txt:
+            bulk_conversion(path_txt)
 
+    source_file = None
     if path_txt:
-        # Read the content of the file and update session state
-        text = files.select_txt(path_txt)
-        st.session_state.text = text
+        # Read the beginning of the file and update session state
+        selected = files.select_txt(path_txt)
+        if selected is not None:
+            file_path, text, complete = selected
+            st.session_state.text = text
+            if not complete:
+                # Only the preview is in memory: downloads convert the whole file from disk
+                source_file = file_path
 
     with st.container():
         col1, col2 = st.columns(2)
@@ -60,24 +207,34 @@ def body():
 
             # Only update session state directly if text_area_input changes
             if st.session_state.text:
-                # Create mirrored Braille PDF for download
-                pdf_buffer_mirror = create_braille_pdf(st.session_state.text, mirror=True)
-                # Create normal Braille PDF for preview
-                pdf_buffer_normal = create_braille_pdf(st.session_state.text, mirror=False)
-
-                st.download_button(
-                    label="Download Braille PDF",
-                    data=pdf_buffer_mirror,
-                    file_name="braille_text.pdf",
-                    mime="application/pdf"
-                )
+                grade = st.radio("Braille grade", list(GRADES), horizontal=True, key='braille_grade')
+                document = braille_document(st.session_state.text, GRADES[grade])
+                download_format = st.radio("Download format", list(DOWNLOAD_FORMATS), horizontal=True,
+                                           key='download_format')
+                braille_format, file_name, mime = DOWNLOAD_FORMATS[download_format]
+                if source_file is not None:
+                    st.info(f"Showing the first {files.PREVIEW_CHARS:,} characters; "
+                            "the download converts the whole file.")
+                    data = file_download(source_file, braille_format, GRADES[grade])
+                elif braille_format is None:
+                    # Create mirrored Braille PDF for download; the preview is drawn without a PDF.
+                    # The disk cache lets other sessions with the same text and grade reuse it.
+                    data = cached_document_pdf(document, mirror=True)
+                else:
+                    # Text formats skip PDF rendering entirely
+                    data = format_braille_text(document.stream, braille_format)
+
+                if data is not None:
+                    st.download_button(
+                        label=f"Download Braille {download_format}",
+                        data=data,
+                        file_name=file_name,
+                        mime=mime
+                    )
                 st.write("Braille PDF Generated. Preview it here:")
-                # Ensure pdf_buffer_normal is reset to the start
-                pdf_buffer_normal.seek(0)
         
         with col2:
             try:
-                img_bytes = pdf_to_image(pdf_buffer_normal)
-                st.image(img_bytes, caption="Preview of the Braille PDF", use_container_width=True)
+                preview(document)
             except Exception as e:
                 st.warning(f"No displaying preview")
@@ -0,0 +1,98 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+import os
+import threading
+import zipfile
+from concurrent.futures import CancelledError, as_completed
+
+from app.utils.batch import convert_file
+
+
+class BulkConversion:
+    """
+    Converts several files in a process pool and collects the outputs into one ZIP file.
+
+    A background thread waits for the conversions and adds each output to the ZIP on disk
+    as soon as it is ready (then deletes it), so the Streamlit script thread never blocks
+    and no output is ever held in memory.
+    """
+
+    def __init__(self, executor, input_paths, output_dir, braille_format='pdf', extension='pdf', table_name=None):
+        """
+        Args:
+            executor (Executor): Pool that runs the conversions.
+            input_paths (list of str): Text files to convert.
+            output_dir (str): Directory for the outputs and the ZIP file.
+            braille_format (str): 'pdf' (mirrored, for embossing) or a braille text format ('brf', 'unicode').
+            extension (str): Extension of the files inside the ZIP.
+            table_name (str or None): Contraction table for Grade 2, or None for Grade 1.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        self.total = len(input_paths)
+        self.done = 0
+        self.errors = []
+        self.finished = False
+        self.zip_path = os.path.join(output_dir, 'braille.zip')
+        if os.path.exists(self.zip_path):
+            os.remove(self.zip_path)
+        self._compression = zipfile.ZIP_STORED if braille_format == 'pdf' else zipfile.ZIP_DEFLATED
+        self._futures = {}
+        for input_path in input_paths:
+            name = os.path.splitext(os.path.basename(input_path))[0] + '.' + extension
+            output_path = os.path.join(output_dir, name)
+            future = executor.submit(convert_file, input_path, output_path, braille_format,
+                                     stamp=True, contractions=table_name)
+            self._futures[future] = name, output_path
+        self._thread = threading.Thread(target=self._collect, daemon=True)
+        self._thread.start()
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+    def cancel(self):
+        """Cancels the conversions that have not started yet."""
+        for future in self._futures:
+            future.cancel()
+
+    def _collect(self):
+        partial_path = self.zip_path + '.part'
+        try:
+            with zipfile.ZipFile(partial_path, 'w', self._compression) as archive:
+                for future in as_completed(self._futures):
+                    name, output_path = self._futures[future]
+                    try:
+                        record = future.result()
+                    except CancelledError:
+                        record = {'status': 'error', 'error': 'cancelled'}
+                    except Exception as error:
+                        record = {'status': 'error', 'error': f"{type(error).__name__}: {error}"}
+                    if record['status'] == 'converted':
+                        # Copied into the ZIP in blocks, then removed from disk
+                        archive.write(output_path, name)
+                    else:
+                        self.errors.append(f"{name}: {record['error']}")
+                    if os.path.exists(output_path):
+                        os.remove(output_path)
+                    self.done += 1
+            os.replace(partial_path, self.zip_path)
+        except OSError as error:
+            # The session directory was removed while converting (e.g. the session ended)
+            self.errors.append(f"{type(error).__name__}: {error}")
+        self.finished = True
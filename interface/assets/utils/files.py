@@ -17,36 +17,77 @@
 
 
 import os
+import shutil
 import tempfile
-import zipfile
-import time
 
 import streamlit as st
 
+from app.utils.textfile import read_preview
+
+
+# Characters of a file kept in session state and shown in the text area.
+# Longer files are converted straight from disk.
+PREVIEW_CHARS = 200_000
+
+
+def session_dir(*parts):
+    """
+    Returns a directory inside the temporary directory of the current session, creating it if needed.
+
+    The session directory is created once and reused on every rerun. It is removed when the
+    session ends (its TemporaryDirectory is garbage collected with the session state) or when
+    the server exits, so long-running servers do not accumulate uploads and outputs.
+    """
+    if 'temp_dir' not in st.session_state:
+        st.session_state.temp_dir = tempfile.TemporaryDirectory(prefix='braillebook-')
+    path = os.path.join(st.session_state.temp_dir.name, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _remove_stale(directory, names):
+    # Files that are no longer uploaded, and the outputs converted from them
+    prefixes = tuple(os.path.splitext(name)[0] + '.' for name in names)
+    for name in os.listdir(directory):
+        if name not in names:
+            os.remove(os.path.join(directory, name))
+            st.session_state.uploaded_file_ids.pop(name, None)
+    output_dir = session_dir('outputs')
+    for name in os.listdir(output_dir):
+        if not name.startswith(prefixes):
+            os.remove(os.path.join(output_dir, name))
+
 
 def load_txt():
     """
     Allows users to upload TXT files using Streamlit.
 
     Returns:
-        dict or None: A dictionary with a temporary directory and a list of names of uploaded TXT files if TXT files were uploaded successfully, or None if no files were uploaded.
+        dict or None: A dictionary with the session's upload directory and a list of names of uploaded TXT files if TXT files were uploaded successfully, or None if no files were uploaded.
     """
     with st.expander("Load txt", expanded=True):
-        path_files = {'temp_dir': tempfile.mkdtemp(), # Temporary directory to store the files
-                      'files': []} # List to store the names of uploaded CSV files
+        path_files = {'temp_dir': session_dir('uploads'), # Session directory that stores the files
+                      'files': []} # List to store the names of uploaded TXT files
 
         uploaded_files = st.file_uploader("Choose an txt...",
                                           type=["txt"],
                                           accept_multiple_files=True,
                                           key="txt_uploader")
 
-        if uploaded_files:
-            for uploaded_file in uploaded_files:
-                original_filename = uploaded_file.name
-                temp_file_path = os.path.join(path_files['temp_dir'], original_filename)
+        written = st.session_state.setdefault('uploaded_file_ids', {})
+        for uploaded_file in uploaded_files or []:
+            original_filename = uploaded_file.name
+            temp_file_path = os.path.join(path_files['temp_dir'], original_filename)
+            # Only new or replaced uploads are written; reruns reuse the copy on disk
+            if written.get(original_filename) != uploaded_file.file_id or not os.path.exists(temp_file_path):
                 with open(temp_file_path, "wb") as temp_file:
-                    temp_file.write(uploaded_file.read())
-                path_files['files'].append(original_filename)
+                    # Copied in blocks, so the upload is not duplicated in memory
+                    shutil.copyfileobj(uploaded_file, temp_file)
+                written[original_filename] = uploaded_file.file_id
+            path_files['files'].append(original_filename)
+        _remove_stale(path_files['temp_dir'], path_files['files'])
+
+        if uploaded_files:
             st.success(".txt files uploaded successfully!")
             return path_files
         else:
@@ -57,23 +98,23 @@ def load_txt():
 
 def select_txt(uploaded_files_info):
     """
-    Selects and reads the content of a TXT file from the uploaded files.
+    Selects a TXT file from the uploaded files and reads at most PREVIEW_CHARS characters of it.
 
     Args:
         uploaded_files_info (dict or None): Dictionary returned by the load_txt() function, which contains information about the uploaded files and the temporary directory.
 
     Returns:
-        str or None: Content of the selected file as a string, or None if no TXT file was loaded or if an error occurred.
+        tuple or None: (path, preview, complete) of the selected file, where complete is False if the file is
+        longer than the preview, or None if no TXT file was loaded or if an error occurred.
     """
     if uploaded_files_info is not None and uploaded_files_info.get('files'):
         selected_file = st.selectbox("Select a CSV file:", uploaded_files_info['files'])
         file_path = os.path.join(uploaded_files_info['temp_dir'], selected_file)
         
-        # Open the file and read its content
+        # Read only the beginning of the file; the rest stays on disk
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-            return content
+            preview, complete = read_preview(file_path, PREVIEW_CHARS)
+            return file_path, preview, complete
         except Exception as error:
             st.error(f"Error reading the file: {error}")
             return None
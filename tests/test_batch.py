@@ -0,0 +1,50 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+
+"""
+Conversión por lotes: qué salidas se consideran al día.
+"""
+
+import pytest
+
+from app.utils.braillebook import A4_PROFILE, US_LETTER_PROFILE
+from app.utils.batch import convert_directory
+
+
+def _statuses(in_dir, out_dir, check, **options):
+    records = convert_directory(str(in_dir), str(out_dir), workers=1, check=check, **options)
+    return [record['status'] for record in records]
+
+
+@pytest.mark.parametrize('check', ['mtime', 'hash'])
+def test_option_change_reconverts(tmp_path, check):
+    in_dir = tmp_path / 'in'
+    in_dir.mkdir()
+    (in_dir / 'a.txt').write_text('Hola mundo.\n', encoding='utf-8')
+    out_dir = tmp_path / 'out'
+    assert _statuses(in_dir, out_dir, check) == ['converted']
+    assert _statuses(in_dir, out_dir, check) == ['skipped']
+    assert _statuses(in_dir, out_dir, check, profile=A4_PROFILE) == ['converted']
+    assert _statuses(in_dir, out_dir, check, profile=A4_PROFILE) == ['skipped']
+    assert _statuses(in_dir, out_dir, check, profile=US_LETTER_PROFILE.with_interpoint()) == ['converted']
+    assert _statuses(in_dir, out_dir, check, profile=US_LETTER_PROFILE.with_interpoint(), stamp=False) == ['converted']
+    assert _statuses(in_dir, out_dir, check, profile=US_LETTER_PROFILE.with_interpoint(),
+                     stamp=False, contractions='en-ueb-g2') == ['converted']
+    assert _statuses(in_dir, out_dir, check, profile=US_LETTER_PROFILE.with_interpoint(),
+                     stamp=False, contractions='en-ueb-g2') == ['skipped']
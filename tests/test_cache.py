@@ -0,0 +1,69 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Caché en disco: presupuesto, recorridos del directorio y temporales abandonados.
+"""
+
+import os
+import time
+
+from app.utils import cache as cache_module
+from app.utils.braillebook import IncrementalDocument
+from app.utils.cache import DiskCache, cached_document_pdf
+
+
+def _walks(monkeypatch):
+    calls = []
+    walk = os.walk
+    monkeypatch.setattr(cache_module.os, 'walk', lambda *args: calls.append(args) or walk(*args))
+    return calls
+
+
+def test_directory_is_walked_only_over_budget(tmp_path, monkeypatch):
+    calls = _walks(monkeypatch)
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+    for number in range(9):
+        cache.put('%064x' % number, b'x' * 100)
+    assert len(calls) == 1 # Solo la primera escritura mide el directorio
+    cache.put('%064x' % 9, b'x' * 200)
+    assert len(calls) == 2
+    assert sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(tmp_path) for name in names) <= 1000
+    assert cache.get('%064x' % 0) is None
+    assert cache.get('%064x' % 9) == b'x' * 200
+
+
+def test_stale_temporary_files_are_removed(tmp_path):
+    os.makedirs(tmp_path / 'ab')
+    stale, fresh = tmp_path / 'ab' / '.tmp-stale', tmp_path / 'ab' / '.tmp-fresh'
+    stale.write_bytes(b'x' * 100)
+    fresh.write_bytes(b'x' * 100)
+    old = time.time() - cache_module.STALE_TEMP_SECONDS - 1
+    os.utime(stale, (old, old))
+    DiskCache(str(tmp_path)).put('ab' + '0' * 62, b'pdf')
+    assert not stale.exists()
+    assert fresh.exists()
+
+
+def test_document_pdf_is_shared_between_documents(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    first = cached_document_pdf(IncrementalDocument('hola mundo', stamp=True), True, cache).getvalue()
+    document = IncrementalDocument('hola mundo', stamp=True)
+    assert cached_document_pdf(document, True, cache).getvalue() == first
+    assert all(page.content is None for page in document._pages) # Ninguna página se dibujó
@@ -0,0 +1,83 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+
+"""
+Braille contraído: cortes del texto que no parten palabras.
+"""
+
+import random
+
+import pytest
+
+from app.utils.braillebook import IncrementalDocument, iter_translate, join_streams, translate_text
+from app.utils.contractions import load_table
+
+
+WORDS = ['the', 'and', 'of', 'with', 'father', 'knowledge', "don't", 'it’s', 'Ch', 'ING', 'x2', '½']
+SEPARATORS = ['\t', ' ', '中', ',', '-', '1', "'", ' ', '\n']
+
+
+@pytest.fixture(scope='module')
+def table():
+    return load_table('en-ueb-g2')
+
+
+def _text(seed, separators, words=2000):
+    rng = random.Random(seed)
+    return ''.join(rng.choice(WORDS) + rng.choice(separators) for _ in range(words))
+
+
+def _same(a, b):
+    return (bytes(a.cells) == bytes(b.cells) and list(a.line_offsets) == list(b.line_offsets)
+            and list(a.page_offsets) == list(b.page_offsets))
+
+
+def test_word_boundaries(table):
+    text = "ab don't\tcd中ef’gh"
+    assert table.word_start(text, 6) == 3
+    assert table.word_end(text, 4) == 8
+    assert table.word_start(text, 9) == 9
+    assert table.word_end(text, 13) == 17
+    assert table.word_start(text, len(text)) == 12
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_chunks_without_spaces_stay_small(table, seed):
+    # Texto sin espacios ni saltos de línea: los cortes caen en tabuladores, NBSP, CJK...
+    separators = SEPARATORS[:-2]
+    text = _text(seed, separators)
+    rng = random.Random(seed)
+    sizes = [rng.randint(1, 50) for _ in range(len(text))]
+    chunks, position = [], 0
+    for size in sizes:
+        chunks.append(text[position:position + size])
+        position += size
+    regrouped = list(table.whole_word_chunks(chunks))
+    assert ''.join(regrouped) == text
+    assert max(map(len, regrouped)) < 50 + max(map(len, WORDS)) * 2
+    expected = translate_text(text, contractions=table)
+    assert _same(join_streams(iter_translate(chunks, contractions=table)), expected)
+
+
+def test_incremental_edit_without_spaces(table):
+    text = _text(5, SEPARATORS[:-2], words=6000)
+    document = IncrementalDocument(text, contractions=table)
+    edited = text[:9000] + 'father\t' + text[9000:]
+    document.update(edited)
+    assert _same(document.stream, translate_text(edited, contractions=table))
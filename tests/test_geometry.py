@@ -0,0 +1,75 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Geometría de los puntos de todos los motores frente a la copia congelada del motor original
+(benchmarks.check_geometry), con menos casos que la herramienta de línea de órdenes.
+"""
+
+import pytest
+
+from app.utils.braillebook import A4_PROFILE, US_LETTER_PROFILE
+from benchmarks.check_geometry import (ENGINES, KNOWN_DIFFERENCES, Case, check_case, generate_case,
+                                       reference_engine, run_engine)
+
+
+CASES = 8
+
+# Textos límite que el generador solo produce de vez en cuando
+EDGE_TEXTS = ('a', '\n' * 24, '\n' * 24 + 'a', '\n' * 48 + 'Ab', 'a' * 28 + 'A1', 'Σ' * 40 + 'x', 'x\n' * 25)
+
+
+def _case(text, profile=US_LETTER_PROFILE, mirror=False):
+    return Case(0, text, profile, None, mirror, False, 0)
+
+
+@pytest.mark.parametrize('engine', list(ENGINES))
+def test_engines_match_reference(engine):
+    failures = []
+    for number in range(CASES):
+        case = generate_case(number, 0)
+        message, _ = check_case(ENGINES[engine], case, reference_engine(case), 0.01)
+        if message is not None:
+            failures.append(f"{case.describe()}: {message}")
+    assert not failures, '\n'.join(failures)
+
+
+@pytest.mark.parametrize('text', EDGE_TEXTS)
+def test_edge_texts_match_reference(text):
+    for profile in (US_LETTER_PROFILE, A4_PROFILE.with_interpoint()):
+        case = _case(text, profile, mirror=True)
+        for name in ('layout', 'reportlab', 'native-stamp', 'stream'):
+            assert check_case(ENGINES[name], case, reference_engine(case), 0.01)[0] is None, name
+
+
+def test_reference_page_breaks():
+    # Lo que hacía el motor original: una página llena de saltos de línea se emite vacía
+    # y la última página vacía se descarta
+    assert [len(page) for page in reference_engine(_case('\n' * 24))] == [0]
+    assert [len(page) for page in reference_engine(_case('\n' * 24 + 'a'))] == [0, 1]
+    assert len(reference_engine(_case('\n' * 47))) == 1
+
+
+@pytest.mark.parametrize('text', ('', '\n\n', '中' * 40))
+def test_empty_document_has_one_blank_page(text):
+    # Diferencia aceptada con el motor original, que daba un PDF de 0 páginas
+    assert 'empty-document' in KNOWN_DIFFERENCES
+    case = _case(text)
+    assert [len(page) for page in reference_engine(case)] == [0]
+    for name in ('layout', 'reportlab', 'native'):
+        assert [len(page) for page in run_engine(ENGINES[name], case)] == [0], name
@@ -0,0 +1,58 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Memoria de write_braille_pdf: el pico no debe crecer con la longitud del texto.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('resource')
+
+# Convierte N KiB de texto generado por trozos (el texto nunca está entero en memoria)
+# e imprime el pico de memoria residente del proceso en KiB.
+_CHILD = '''
+import resource, sys
+from app.utils.braillebook import write_braille_pdf
+
+chunk = 'El veloz murciélago hindú comía FELIZ cardillo y kiwi, 1234.\\n' * 64
+size = int(sys.argv[1]) << 10
+write_braille_pdf((chunk for _ in range(size // len(chunk))), sys.argv[2], stamp=True)
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+# Margen permitido entre ambos tamaños; un texto ocho veces mayor que se mantuviera
+# entero en memoria (texto, celdas y puntos) lo supera con creces.
+MARGIN_KIB = 10 << 10
+
+
+def _peak_rss(kibibytes, output):
+    result = subprocess.run([sys.executable, '-c', _CHILD, str(kibibytes), str(output)],
+                            capture_output=True, text=True, check=True, cwd=Path(__file__).parents[1])
+    return int(result.stdout.split()[-1])
+
+
+def test_peak_memory_does_not_grow_with_text(tmp_path):
+    small = _peak_rss(512, tmp_path / 'small.pdf')
+    large = _peak_rss(4096, tmp_path / 'large.pdf')
+    assert (tmp_path / 'large.pdf').stat().st_size > 4 * (tmp_path / 'small.pdf').stat().st_size
+    assert large - small < MARGIN_KIB, 'pico de %d KiB con 512 KiB de texto y %d KiB con 4 MiB' % (small, large)
@@ -0,0 +1,79 @@
+# BRAILLEBOOK Copyright (C) 2025 Daniel A.L.
+# Contact: caminodelaserpiente.py@gmail.com
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+
+"""
+Respuestas del servicio HTTP cuando falla la conversión.
+"""
+
+import asyncio
+import json
+import os
+import signal
+
+from app.utils import service
+
+
+def _request(app, path, body=b'', method='POST', query=b''):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query, 'headers': []}
+    asyncio.run(app(scope, receive, send))
+    return messages[0]['status'], json.loads(messages[1]['body']) if messages[0]['status'] != 200 else messages[1]['body']
+
+
+def _failing_convert(*args):
+    raise RuntimeError('tabla rota')
+
+
+def _dying_convert(*args):
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def test_conversion_error_is_a_500_response(monkeypatch):
+    # Los procesos se crean con fork después del parche, así que también lo ven
+    monkeypatch.setattr(service, '_convert', _failing_convert)
+    app = service.ConversionService(workers=1)
+    try:
+        status, body = _request(app, '/convert', b'hola')
+    finally:
+        app.close()
+    assert status == 500
+    assert body == {'error': 'RuntimeError: tabla rota'}
+
+
+def test_broken_pool_is_replaced(monkeypatch):
+    app = service.ConversionService(workers=1)
+    try:
+        with monkeypatch.context() as patch:
+            patch.setattr(service, '_convert', _dying_convert)
+            app.start(wait=True)
+            status, body = _request(app, '/convert', b'hola')
+        assert status == 500
+        assert body['error'].startswith('BrokenProcessPool')
+        status, body = _request(app, '/convert', b'hola', query=b'format=unicode')
+        assert status == 200
+        assert body.startswith('⠓⠕⠇⠁'.encode('utf-8'))
+    finally:
+        app.close()